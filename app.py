@@ -1,13 +1,34 @@
 import os
 
-import plotly.io as pio
 import streamlit as st
 
+from exosky.metrics import metrics
 from exosky.query import DataLoader
+from exosky.raster import RasterVizualizer
 from exosky.service import ExoplanetService
 from exosky.vizualizer import MollweideVizualizer
 
-service = ExoplanetService(DataLoader(), MollweideVizualizer())
+# "matplotlib" (default) or "raster", see exosky.raster.RasterVizualizer
+RENDERER = os.environ.get("EXOSKY_RENDERER", "matplotlib")
+# sky maps of the first rows of a distance search are rendered in the background
+PREFETCH_TOP_K = 5
+# rows of the distance search results shown at a time
+EXOPLANETS_PER_PAGE = 100
+
+
+@st.cache_resource
+def get_service() -> ExoplanetService:
+    """One warm service per server process, shared across reruns and sessions."""
+    vizualizer = RasterVizualizer() if RENDERER == "raster" else MollweideVizualizer()
+    service = ExoplanetService(DataLoader(), vizualizer, sky_map_cache_dir="tmp/sky_maps")
+    service.preload_in_background()
+    return service
+
+
+service = get_service()
+if not service.ready.is_set():
+    with st.spinner("Loading star catalogs..."):
+        service.wait_until_ready()
 
 if "is_planet_selected" not in st.session_state:
     st.session_state["is_planet_selected"] = [False, ""]
@@ -50,8 +71,9 @@ Enjoy exploring the universe! 🌌
     st.title("Look at the Sky from Earth 🌍 ")
     grid = st.checkbox("Show grid", value=True)
     mollwide = st.checkbox("Mollwide", value=False)
-    fig, _ = service.plot_exoplanet_projection("Earth", grid=grid, mollweide=mollwide)
-    st.pyplot(fig)
+    sky_map = service.render_sky_map("Earth", grid=grid, mollweide=mollwide)
+    with metrics.span("app.st_image"):
+        st.image(sky_map)
     st.write("Do you want to see the sky from other planet`s perspective?")
     st.markdown("Follow this **demo simulation** for that.")
     st.write("**Step 1:** Set the distance range from Earth.")
@@ -90,21 +112,40 @@ if chosen_distance and not st.session_state["is_distance_chosen"][0]:
     )
 
 if distance_chosen:
+    st.session_state["is_distance_chosen"] = [True, chosen_distance]
+    st.session_state["exoplanet_page"] = 1
     with st.spinner("Searching for your exoplanets..."):
-        nearest_exoplanets = service.get_exoplanets_within_distance(
-            chosen_distance[0], chosen_distance[1]
-        )
-        nearest_exoplanets = nearest_exoplanets.sort_values(by="sy_dist").reset_index(
-            drop=True
+        service.prefetch(
+            service.get_exoplanets_within_distance(*chosen_distance, limit=PREFETCH_TOP_K)["pl_name"],
+            top_k=PREFETCH_TOP_K,
+            sky_maps=True,
+            # matplotlib renders take seconds and hold the service's render lock, so only the view shown
+            # first (grid, rectangular, Earth) is rendered ahead; raster renders are cheap enough for all
+            views=ExoplanetService.SKY_MAP_VIEWS if RENDERER == "raster" else ExoplanetService.SKY_MAP_VIEWS[:1],
         )
 
+if st.session_state["is_distance_chosen"][0]:
+    # only the rows of the current page are built, the search results are counted, not loaded
+    distance_range = st.session_state["is_distance_chosen"][1]
+    exoplanet_count = service.count_exoplanets_within_distance(*distance_range)
+    page_count = max(-(-exoplanet_count // EXOPLANETS_PER_PAGE), 1)
+    page = st.sidebar.number_input(
+        f"Page of the exoplanets found (1 to {page_count})", min_value=1, max_value=page_count, key="exoplanet_page"
+    )
+    exoplanet_page = service.get_exoplanets_within_distance(
+        *distance_range, offset=(page - 1) * EXOPLANETS_PER_PAGE, limit=EXOPLANETS_PER_PAGE
+    )
+
+if distance_chosen or (st.session_state["is_distance_chosen"][0] and not st.session_state["is_planet_selected"][0]):
     st.sidebar.markdown(
-        f"Number of exoplanets within {chosen_distance} parsecs: <span style='color:red'>{len(nearest_exoplanets)}</span>",
+        f"Number of exoplanets within {distance_range} parsecs: <span style='color:red'>{exoplanet_count}</span>",
         unsafe_allow_html=True,
     )
+    first_row = (page - 1) * EXOPLANETS_PER_PAGE
     st.markdown(
-        f"""Here are the <span style='color:red'>{len(nearest_exoplanets)}</span> nearest exoplanets within {chosen_distance}
-        parsecs, sorted by distance to Earth:""",
+        f"""Here are the <span style='color:red'>{exoplanet_count}</span> nearest exoplanets within {distance_range}
+        parsecs, sorted by distance to Earth (rows {min(first_row + 1, exoplanet_count)} to
+        {first_row + len(exoplanet_page)}):""",
         unsafe_allow_html=True,
     )
 
@@ -112,9 +153,10 @@ if distance_chosen:
         "Select an exoplanet in the **sidebar** to explore 🔭  the stars around it."
     )
     st.dataframe(
-        nearest_exoplanets[
+        exoplanet_page[
             ["pl_name", "sy_dist", "ra", "dec", "pl_orbsmax", "st_mass", "st_rad"]
-        ]
+        ],
+        hide_index=True,
     )
 
     st.markdown(
@@ -130,8 +172,6 @@ if distance_chosen:
     """
     )
 
-    st.session_state["is_distance_chosen"] = [True, nearest_exoplanets]
-
 st.sidebar.title("Choose your exoplanet 🌠")
 
 if not st.session_state["is_distance_chosen"][0]:
@@ -150,11 +190,23 @@ elif (
 
 
 if st.session_state["is_distance_chosen"][0]:
-    selected_exoplanet = st.sidebar.selectbox(
-        "Select an Exoplanet",
-        st.session_state["is_distance_chosen"][1]["pl_name"].unique(),
-    )
-    is_view_sky = st.sidebar.button("View Sky Perspective")
+    exoplanet_query = st.sidebar.text_input("Search the exoplanets found by name (optional):")
+    if exoplanet_query:
+        min_distance, max_distance = distance_range
+        exoplanet_options = service.search_exoplanets(
+            exoplanet_query, limit=50, min_distance=min_distance, max_distance=max_distance
+        )
+        if not exoplanet_options:
+            st.sidebar.markdown(
+                f'<span style="color:red;">No exoplanet within {distance_range} parsecs '
+                "matches your search.</span>",
+                unsafe_allow_html=True,
+            )
+    else:
+        exoplanet_options = exoplanet_page["pl_name"].unique()
+    selected_exoplanet = st.sidebar.selectbox("Select an Exoplanet", exoplanet_options)
+    # nothing to show without a selection, e.g. when the search finds no exoplanet
+    is_view_sky = st.sidebar.button("View Sky Perspective", disabled=selected_exoplanet is None)
 else:
     selected_exoplanet = None
     is_view_sky = None
@@ -176,7 +228,7 @@ elif st.session_state["is_planet_selected"][0]:
 
 planet1 = st.session_state["is_planet_selected"][1]
 
-if is_view_sky:
+if is_view_sky and selected_exoplanet is not None:
     st.session_state["is_planet_selected"] = [True, selected_exoplanet]
 
 planet2 = st.session_state["is_planet_selected"][1]
@@ -195,13 +247,14 @@ if st.session_state["is_planet_selected"][0]:
         show_earth = st.checkbox("Show Earth", value=True)
     else:
         show_earth = False
-    fig, _ = service.plot_exoplanet_projection(
+    sky_map = service.render_sky_map(
         st.session_state["is_planet_selected"][1],
         grid=grid,
         mollweide=mollwide,
         display_earth=show_earth,
     )
-    st.pyplot(fig)
+    with metrics.span("app.st_image"):
+        st.image(sky_map)
 
 
 if not distance_chosen and not st.session_state["is_planet_selected"][0]:
@@ -241,12 +294,7 @@ if st.session_state["is_planet_selected"][0] and st.session_state["drawing_mode"
     #     value=100,
     # )
 
-    stars = service.get_exoplanet_projection(st.session_state["is_planet_selected"][1])
-    stars = stars.dropna(subset=["new_ra", "new_dec", "apparent_magnitude"])
-    stars = stars.nsmallest(n, "apparent_magnitude")
-    stars = stars[["name", "new_ra", "new_dec", "apparent_magnitude"]]
-    stars["s"] = stars["apparent_magnitude"].apply(lambda x: 35 * 10 ** (x / -2.5))
-    stars = stars.reset_index(drop=True)
+    stars = service.brightest_stars(st.session_state["is_planet_selected"][1], n)
     # st.dataframe(stars)
 
     selected_star = st.sidebar.selectbox(
@@ -284,6 +332,8 @@ if st.session_state["is_planet_selected"][0] and st.session_state["drawing_mode"
             if not os.path.exists("const_img"):
                 os.makedirs("const_img")
             if len(images) < IMAGE_LIMIT:
+                import plotly.io as pio  # loads the image export backend, only when saving
+
                 pio.write_image(fig, f"const_img/{const_name}.png")
                 st.sidebar.success(f"Plot saved as {const_name}.png")
             elif len(images) >= IMAGE_LIMIT:
@@ -317,3 +367,13 @@ if st.session_state["is_planet_selected"][0] and st.session_state["drawing_mode"
 
 if st.session_state["drawing_mode"]:
     st.sidebar.button("Disable Drawing Mode", on_click=enable_drawing_mode)
+
+
+# Debug panel, shown when instrumentation is enabled (EXOSKY_METRICS=1) ------------------------
+
+if metrics.enabled:
+    with st.sidebar.expander("Performance (debug)"):
+        st.dataframe(metrics.summary())
+        st.write("Projection cache:", service.projection_cache_stats())
+        st.write("Sky map cache:", service.sky_map_cache_stats())
+        st.code(service.prometheus_metrics(), language="text")
@@ -0,0 +1,60 @@
+"""
+Host star cross-match: exoplanet hosts placed on stars of a synthetic Gaia catalog, with the position
+and distance errors of the archive, matched back with `NearestStarIndex` as `ExoplanetService` does.
+
+    python -m benchmarks.crossmatch --stars 1000000 --hosts 6000 --budget 2
+
+Reports the index build and match times and the share of hosts matched to their own star; the command
+exits with status 1 when both together take longer than `--budget` seconds.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_gaia_stars
+from exosky.catalog import StarCatalog
+from exosky.index import NearestStarIndex
+from exosky.service import ExoplanetService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stars", type=int, default=1000000)
+    parser.add_argument("--hosts", type=int, default=6000, help="about the number of archive exoplanets")
+    parser.add_argument("--position-error", type=float, default=2, help="archive position error, in arcseconds")
+    parser.add_argument("--distance-error", type=float, default=0.05, help="relative error of sy_dist")
+    parser.add_argument("--budget", type=float, default=2.0, help="in seconds")
+    args = parser.parse_args()
+
+    stars = StarCatalog.from_dataframe(synthetic_gaia_stars(args.stars))
+    rng = np.random.default_rng(0)
+    (candidates,) = np.nonzero(stars["parallax"] > 0)
+    hosts = rng.choice(candidates, args.hosts, replace=False)
+    ra = stars["ra"][hosts] + rng.normal(0, args.position_error / 3600, args.hosts) / np.cos(
+        np.radians(stars["dec"][hosts])
+    )
+    dec = np.clip(stars["dec"][hosts] + rng.normal(0, args.position_error / 3600, args.hosts), -90, 90)
+    sy_dist = 1000 / stars["parallax"][hosts] * rng.normal(1, args.distance_error, args.hosts)
+
+    start = time.perf_counter()
+    distance = np.where(stars["parallax"] > 0, 1000 / stars["parallax"].astype(np.float64), np.nan)
+    index = NearestStarIndex(stars["ra"], stars["dec"], distance, ExoplanetService.HOST_MATCH_SEPARATION)
+    built = time.perf_counter()
+    matches, separation = index.query(ra, dec, sy_dist, ExoplanetService.HOST_MATCH_DISTANCE_TOLERANCE)
+    matched = time.perf_counter()
+
+    print(f"{args.stars} stars, {args.hosts} hosts")
+    print(f"index built in {(built - start) * 1000:8.1f} ms")
+    print(f"matched in     {(matched - built) * 1000:8.1f} ms")
+    print(f"own star {np.mean(matches == hosts):.2%}, other star {np.mean((matches >= 0) & (matches != hosts)):.2%}")
+    print(f"median separation {np.nanmedian(separation):.2f} arcsec")
+    if matched - start > args.budget:
+        print(f"Cross-match took {matched - start:.2f} s, over the {args.budget} s budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Frame rate of the fly-through: streamed projections alone, then rendered frames, on a synthetic
+catalog flown from Earth to an exoplanet.
+
+    python -m benchmarks.flythrough --stars 100000 --frames 120 --target-fps 24
+
+The command exits with status 1 when the rendered frame rate is below `--target-fps`.
+"""
+
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from benchmarks.synthetic import SyntheticDataLoader  # noqa: E402
+from exosky.atlas import RENDERERS  # noqa: E402
+from exosky.service import ExoplanetService  # noqa: E402
+
+
+def frames_per_second(frames) -> float:
+    start = time.perf_counter()
+    count = sum(1 for _ in frames)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stars", type=int, default=100000)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--renderer", choices=tuple(RENDERERS), default="raster")
+    parser.add_argument("--target-fps", type=float, default=24)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="exosky-flythrough-") as cache_dir:
+        data_loader = SyntheticDataLoader(pathlib.Path(cache_dir), args.stars, 100)
+        service = ExoplanetService(data_loader, RENDERERS[args.renderer]())
+        service.preload()
+        name = service.get_exoplanets_within_distance(100, None, limit=1)["pl_name"].iloc[0]
+        positions = service.flight_path(name, args.frames)
+
+        projected = frames_per_second(service.fly_through(positions))
+        rendered = frames_per_second(service.render_fly_through(positions))
+
+    print(f"{args.stars} stars, {args.frames} frames to {name}")
+    print(f"projection {projected:8.1f} frames/s")
+    print(f"rendered   {rendered:8.1f} frames/s ({args.renderer})")
+    if rendered < args.target_fps:
+        print(f"Rendered frame rate below the {args.target_fps} frames/s target", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Parity check of the NumPy projection engine against the astropy reference: the sky of a few exoplanets
+of a synthetic catalog, computed with `projection_mode="numpy"` and with `projection_mode="astropy"`.
+
+    python -m benchmarks.parity --stars 20000 --exoplanets 10 --tolerance 1e-6
+
+The command exits with status 1 when an ra, dec (degrees) or apparent magnitude differs by more than
+`--tolerance`, or when the two modes disagree on which values are undefined.
+"""
+
+import argparse
+import pathlib
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.synthetic import SyntheticDataLoader
+from exosky.service import ExoplanetService
+from exosky.vizualizer import MollweideVizualizer
+
+
+def differences(projection, reference) -> dict[str, float]:
+    """Largest difference of every column, NaN where only one of the projections has undefined values."""
+    result = {}
+    for column, values, expected in zip(projection._fields, projection, reference):
+        undefined = np.isnan(values)
+        if not np.array_equal(undefined, np.isnan(expected)):
+            result[column] = np.nan
+            continue
+        difference = np.abs(values[~undefined] - expected[~undefined])
+        if column == "ra":
+            difference = np.minimum(difference, 360 - difference)  # 0 and 360 are the same direction
+        result[column] = float(difference.max()) if len(difference) else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stars", type=int, default=20000)
+    parser.add_argument("--exoplanets", type=int, default=10, help="number of viewpoints compared")
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="exosky-parity-") as cache_dir:
+        data_loader = SyntheticDataLoader(pathlib.Path(cache_dir), args.stars, max(args.exoplanets, 100))
+        services = {
+            mode: ExoplanetService(data_loader, MollweideVizualizer(), projection_mode=mode)
+            for mode in ExoplanetService.PROJECTION_MODES
+        }
+        names = services["numpy"].get_exoplanets_within_distance()["pl_name"]
+        # evenly spread over the distances, from the nearest to the farthest exoplanet
+        names = names.iloc[np.unique(np.linspace(0, len(names) - 1, args.exoplanets).astype(int))]
+        found = {}
+        for name in names:
+            projection, reference = (services[mode]._compute_projection(name) for mode in ("numpy", "astropy"))
+            for column, difference in differences(projection, reference).items():
+                found.setdefault(column, []).append(difference)
+        # NaN (undefined values that do not match) is the worst difference
+        worst = {column: np.max(found[column]) for column in found}
+
+    print(f"{args.stars} stars, {len(names)} exoplanets")
+    for column, difference in worst.items():
+        print(f"{column:>20} max difference {difference:.3g}")
+    failed = [column for column, difference in worst.items() if not difference <= args.tolerance]
+    if failed:
+        print(f"Projection differs from astropy by more than {args.tolerance}: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the matplotlib and raster sky renderers on a synthetic star field.
+
+    python -m benchmarks.render --stars 100000 --repeat 3
+"""
+
+import argparse
+import io
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+
+from exosky.raster import RasterVizualizer  # noqa: E402
+from exosky.vizualizer import MollweideVizualizer  # noqa: E402
+
+
+def synthetic_sky(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0, 360, n)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    mag = rng.uniform(-1, 15, n)
+    bp_rp = rng.normal(1, 0.5, n)
+    return ra, dec, mag, bp_rp
+
+
+def render_matplotlib(vizualizer, sky, **kwargs) -> bytes:
+    fig, _ = vizualizer.plot(*sky, **kwargs)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    vizualizer.release(fig)
+    return buffer.getvalue()
+
+
+def render_raster(vizualizer, sky, **kwargs) -> bytes:
+    image, _ = vizualizer.plot(*sky, **kwargs)
+    return image.png
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stars", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sky = synthetic_sky(args.stars)
+    earth = (120.0, 40.0, 10.0)
+    backends = {
+        "matplotlib": (render_matplotlib, MollweideVizualizer()),
+        "raster": (render_raster, RasterVizualizer()),
+    }
+    cases = {
+        "rectangular": dict(grid=True, mollweide=False),
+        "rectangular+earth": dict(grid=True, mollweide=False, earth=earth),
+        "mollweide": dict(grid=True, mollweide=True),
+    }
+    print(f"{'case':<20}{'backend':<12}{'best, s':>10}{'png, kB':>10}")
+    for case, kwargs in cases.items():
+        for backend, (render, vizualizer) in backends.items():
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                png = render(vizualizer, sky, **kwargs)
+                timings.append(time.perf_counter() - start)
+            print(f"{case:<20}{backend:<12}{min(timings):>10.3f}{len(png) / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Soak test of the sky map rendering: renders thousands of maps, cycling through exoplanets and view
+toggles with the caches disabled, and checks that the process memory stays flat.
+
+    python -m benchmarks.soak --renders 2000 --max-growth 50
+
+The resident set size is sampled after a warm-up and then every `--sample-every` renders; the
+command exits with status 1 when it grew by more than `--max-growth` MB over the run.
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import pathlib
+import resource
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from benchmarks.suite import service_for  # noqa: E402
+from benchmarks.synthetic import SyntheticDataLoader  # noqa: E402
+from exosky.service import ExoplanetService  # noqa: E402
+
+
+def rss_mb() -> float:
+    """Current resident set size, or the peak one where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=2000)
+    parser.add_argument("--stars", type=int, default=20000)
+    parser.add_argument("--exoplanets", type=int, default=50, help="number of exoplanets cycled through")
+    parser.add_argument("--warmup", type=int, default=50, help="renders before the reference memory sample")
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--max-growth", type=float, default=50, help="allowed memory growth, in MB")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="exosky-soak-") as cache_dir:
+        data_loader = SyntheticDataLoader(pathlib.Path(cache_dir), args.stars, max(args.exoplanets, 100))
+        service = service_for(data_loader)
+        service.preload()
+        names = service.get_exoplanets_within_distance(limit=args.exoplanets)["pl_name"].tolist()
+        renders = itertools.cycle(itertools.product(names, ExoplanetService.SKY_MAP_VIEWS))
+
+        start = time.perf_counter()
+        baseline = current = None
+        for i in range(1, args.renders + 1):
+            name, (grid, mollweide, display_earth) = next(renders)
+            service.render_sky_map(name, grid, mollweide, display_earth)
+            if i == args.warmup:
+                gc.collect()
+                baseline = rss_mb()
+                print(f"{i:>7} renders  {baseline:8.1f} MB (reference)")
+            elif baseline is not None and (i % args.sample_every == 0 or i == args.renders):
+                gc.collect()
+                current = rss_mb()
+                print(f"{i:>7} renders  {current:8.1f} MB  {current - baseline:+7.1f} MB")
+
+        elapsed = time.perf_counter() - start
+        service.close()
+
+    if current is None:
+        print("Not enough renders to measure the memory growth", file=sys.stderr)
+        sys.exit(2)
+    growth = current - baseline
+    print(f"{args.renders} renders in {elapsed:.1f} s ({args.renders / elapsed:.1f}/s), memory growth {growth:+.1f} MB")
+    if growth > args.max_growth:
+        print(f"Memory grew by more than {args.max_growth} MB", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
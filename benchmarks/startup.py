@@ -0,0 +1,108 @@
+"""
+Startup-time regression check: cold import of the modules the app needs, then a warm-cache start
+(load the cached catalogs and render the sky from Earth), each in a fresh interpreter.
+
+    python -m benchmarks.startup --budget 2 --repeat 3
+
+The command exits with status 1 when the import takes longer than `--budget` seconds, or when a
+module that should load lazily (remote queries, plotly, astropy) is imported on the warm path.
+"""
+
+import argparse
+import json
+import pathlib
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import synthetic_exoplanets, synthetic_gaia_stars
+from exosky.catalog import StarCatalog
+from exosky.query import DataLoader
+
+# what app.py imports before serving anything
+APP_MODULES = ("exosky.metrics", "exosky.query", "exosky.raster", "exosky.service", "exosky.vizualizer")
+# only needed on a cache miss, in drawing mode and in the "astropy" projection mode
+LAZY_MODULES = ("astroquery", "astropy", "plotly")
+
+STARTUP = """
+import json, sys, time
+
+start = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+
+import matplotlib
+
+matplotlib.use("Agg")
+service = exosky.service.ExoplanetService(
+    exosky.query.DataLoader(sys.argv[1]), exosky.vizualizer.MollweideVizualizer()
+)
+service.preload()
+service.render_sky_map("Earth")
+rendered = time.perf_counter()
+
+print(json.dumps({{
+    "import_s": imported - start,
+    "first_render_s": rendered - imported,
+    "lazy_modules": sorted({{name.split(".")[0] for name in sys.modules}} & set(sys.argv[2:])),
+}}))
+"""
+
+
+def prime_cache(cache_dir: pathlib.Path, stars: int, exoplanets: int):
+    """Fill the `DataLoader` cache under its default query parameters, as after a first run."""
+    data_loader = DataLoader(cache_dir)
+    data_loader.cache.load(
+        "exoplanet_archive_cache",
+        data_loader._exoplanet_archive_params(),
+        lambda: synthetic_exoplanets(exoplanets),
+    )
+    data_loader.cache.load(
+        "gaia_cache",
+        data_loader._gaia_stars_params(DataLoader.DEFAULT_GAIA_STARS),
+        lambda: StarCatalog.compact(synthetic_gaia_stars(stars)),
+    )
+
+
+def start(cache_dir: pathlib.Path) -> dict:
+    script = STARTUP.format(imports="\n".join(f"import {module}" for module in APP_MODULES))
+    output = subprocess.run(
+        [sys.executable, "-c", script, str(cache_dir), *LAZY_MODULES],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=2.0, help="cold import budget, in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="the fastest start is compared to the budget")
+    parser.add_argument("--stars", type=int, default=DataLoader.DEFAULT_GAIA_STARS)
+    parser.add_argument("--exoplanets", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="exosky-startup-") as cache_dir:
+        cache_dir = pathlib.Path(cache_dir)
+        prime_cache(cache_dir, args.stars, args.exoplanets)
+        runs = [start(cache_dir) for _ in range(args.repeat)]
+
+    for run in runs:
+        print(f"import {run['import_s'] * 1000:8.1f} ms   first render {run['first_render_s'] * 1000:8.1f} ms")
+    best = min(run["import_s"] for run in runs)
+    lazy_modules = sorted({name for run in runs for name in run["lazy_modules"]})
+
+    failed = False
+    if best > args.budget:
+        print(f"Cold import took {best:.2f} s, over the {args.budget} s budget", file=sys.stderr)
+        failed = True
+    if lazy_modules:
+        print(f"Imported on the warm-cache path: {', '.join(lazy_modules)}", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Offline benchmark suite: times the service hot paths on synthetic catalogs of several sizes.
+
+    python -m benchmarks.suite --stars 10000 100000 1000000 --output results.json
+    python -m benchmarks.suite --save-baseline          # store the results as benchmarks/baseline.json
+
+Results are written as JSON and compared, case by case, with the baseline; the command exits
+with status 1 when a case is slower than `--tolerance` times its baseline median.
+Baselines are machine specific, record a new one before comparing on another machine.
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+
+from benchmarks.synthetic import SyntheticDataLoader  # noqa: E402
+from exosky.service import ExoplanetService  # noqa: E402
+from exosky.vizualizer import MollweideVizualizer  # noqa: E402
+
+BASELINE = pathlib.Path(__file__).with_name("baseline.json")
+
+
+def timed(function, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def service_for(data_loader) -> ExoplanetService:
+    # nothing is cached, so every repetition measures the full computation
+    return ExoplanetService(data_loader, MollweideVizualizer(), projection_cache_bytes=0, sky_map_cache_bytes=0)
+
+
+def run_cases(stars: int, exoplanets: int, repeat: int, cache_dir: pathlib.Path) -> dict[str, list[float]]:
+    """Timings in seconds of every case for a catalog of `stars` stars."""
+    data_loader = SyntheticDataLoader(cache_dir / f"stars-{stars}", stars, exoplanets)
+    data_loader.load_gaia_stars()  # generate and write the cache outside of the timings
+    data_loader.load_exoplanet_archive()
+
+    service = service_for(data_loader)
+    timings = {"load": timed(lambda: service_for(data_loader).preload(), repeat)}
+    service.preload()
+
+    def crossmatch():
+        # the host stars are matched at preload, `load` includes this case
+        service.__dict__.pop("_host_stars", None)
+        service._host_stars
+
+    timings["crossmatch_hosts"] = timed(crossmatch, repeat)
+
+    rng = np.random.default_rng(0)
+    names = rng.choice(service.get_exoplanets_within_distance()["pl_name"].to_numpy(), repeat)
+    names = iter(list(names) * 3)
+    timings["get_exoplanet_projection"] = timed(lambda: service.get_exoplanet_projection(next(names)), repeat)
+    timings["get_visible_stars"] = timed(lambda: service.get_visible_stars(next(names)), repeat)
+
+    ranges = np.sort(rng.uniform(0, 2000, (100, 2)), axis=1)
+    timings["get_exoplanets_within_distance"] = [
+        timing / len(ranges)
+        for timing in timed(lambda: [service.get_exoplanets_within_distance(*bounds) for bounds in ranges], repeat)
+    ]
+
+    name = service.get_exoplanets_within_distance(limit=1)["pl_name"].iloc[0]
+    projection = service.get_projection(name)
+    bp_rp = service._star_catalog["bp_rp"]
+
+    def plot():
+        # pooled figures only swap their data in `plot`, the drawing happens when the image is encoded
+        fig, _ = service.vizualizer.plot(projection.ra, projection.dec, projection.apparent_magnitude, bp_rp)
+        service.vizualizer.encode(fig)
+
+    timings["MollweideVizualizer.plot+encode"] = timed(plot, repeat)
+    timings["render_sky_map"] = timed(lambda: service.render_sky_map(name), repeat)
+
+    stars_df = service.brightest_stars(name, 1000)
+    selected = list(stars_df["name"].iloc[:20])
+    timings["plot_star_chart"] = timed(lambda: service.plot_star_chart(stars_df, selected), repeat)
+    return timings
+
+
+def summarize(stars: int, timings: dict[str, list[float]]) -> list[dict]:
+    return [
+        {
+            "case": case,
+            "stars": stars,
+            "best_s": min(values),
+            "median_s": float(np.median(values)),
+            "repeat": len(values),
+        }
+        for case, values in timings.items()
+    ]
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    """Add the ratio to the baseline median to every result; returns the regressions."""
+    reference = {(result["case"], result["stars"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get((result["case"], result["stars"]))
+        if base is None:
+            continue
+        result["baseline_median_s"] = base["median_s"]
+        result["ratio"] = result["median_s"] / base["median_s"]
+        if result["ratio"] > tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stars", type=int, nargs="+", default=[10000, 100000], help="catalog sizes, up to 1e7")
+    parser.add_argument("--exoplanets", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=pathlib.Path, help="where to write the JSON results")
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="exosky-benchmark-") as cache_dir:
+        for stars in args.stars:
+            results += summarize(stars, run_cases(stars, args.exoplanets, args.repeat, pathlib.Path(cache_dir)))
+
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else []
+    regressions = [] if args.save_baseline else compare(results, baseline, args.tolerance)
+
+    print(f"{'case':<34}{'stars':>10}{'median, ms':>12}{'vs baseline':>13}")
+    for result in results:
+        ratio = f"{result['ratio']:.2f}x" if "ratio" in result else "-"
+        print(f"{result['case']:<34}{result['stars']:>10}{result['median_s'] * 1000:>12.2f}{ratio:>13}")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "results": results,
+    }
+    for path in [args.output, args.baseline if args.save_baseline else None]:
+        if path is not None:
+            path.write_text(json.dumps(report, indent=2) + "\n")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than {args.tolerance}x the baseline", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
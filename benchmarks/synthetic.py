@@ -0,0 +1,73 @@
+"""
+Synthetic Gaia-like and exoplanet-archive catalogs, served through the regular `DataLoader`
+cache so that benchmarks exercise the real loading code without network access.
+"""
+
+import numpy as np
+import pandas as pd
+
+from exosky.query import DataLoader
+
+# source_id // 2**35 is the HEALPix level 12 index, there are 12 * 4**12 of them
+MAX_SOURCE_ID = 12 * 4**12 << 35
+GAIA_MAGNITUDE_LIMIT = 15
+
+
+def synthetic_gaia_stars(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    `n` stars with the columns of the Gaia query, isotropic on the sky, with log-normal distances
+    and star counts growing by ~2.2x per magnitude up to G = 15, like the real catalog.
+    """
+    rng = np.random.default_rng(seed)
+    distance = np.exp(rng.normal(np.log(500), 0.9, n))
+    # parallax errors make some of the distant stars negative, as in Gaia
+    parallax = 1000 / distance + rng.normal(0, 0.02, n)
+    magnitude = np.maximum(GAIA_MAGNITUDE_LIMIT + np.log10(rng.uniform(0, 1, n)) / 0.35, -1.5)
+    return pd.DataFrame(
+        {
+            "SOURCE_ID": np.sort(rng.integers(0, MAX_SOURCE_ID, n)),
+            "ra": rng.uniform(0, 360, n),
+            "dec": np.degrees(np.arcsin(rng.uniform(-1, 1, n))),
+            "parallax": parallax,
+            "phot_g_mean_mag": magnitude,
+            "bp_rp": rng.normal(1, 0.5, n),
+        }
+    )
+
+
+def synthetic_exoplanets(n: int, seed: int = 0) -> pd.DataFrame:
+    """`n` planets with the columns of the exoplanet archive query, at log-normal distances."""
+    rng = np.random.default_rng(seed + 1)
+    return pd.DataFrame(
+        {
+            "pl_name": [f"Synth-{i} b" for i in range(n)],
+            "sy_dist": np.clip(np.exp(rng.normal(np.log(400), 1.0, n)), 1.3, 8000),
+            "ra": rng.uniform(0, 360, n),
+            "dec": np.degrees(np.arcsin(rng.uniform(-1, 1, n))),
+            "pl_orbsmax": np.exp(rng.normal(-2, 1.5, n)),
+            "st_mass": np.exp(rng.normal(0, 0.3, n)),
+            "st_rad": np.exp(rng.normal(0, 0.4, n)),
+        }
+    )
+
+
+class SyntheticDataLoader(DataLoader):
+    """`DataLoader` whose archive queries return synthetic catalogs instead of calling NASA and Gaia."""
+
+    def __init__(self, cache_dir, stars: int, exoplanets: int = 5000, seed: int = 0, mmap: bool = True):
+        super().__init__(cache_dir, mmap=mmap)
+        self.stars = stars
+        self.exoplanets = exoplanets
+        self.seed = seed
+
+    def _exoplanet_archive_params(self) -> dict:
+        return {"synthetic": self.exoplanets, "seed": self.seed}
+
+    def _gaia_stars_params(self, number: int) -> dict:
+        return {"synthetic": self.stars, "seed": self.seed}
+
+    def _query_exoplanet_archive(self) -> pd.DataFrame:
+        return synthetic_exoplanets(self.exoplanets, self.seed)
+
+    def _query_gaia_stars(self, number: int) -> pd.DataFrame:
+        return synthetic_gaia_stars(self.stars, self.seed)
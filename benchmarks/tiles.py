@@ -0,0 +1,104 @@
+"""
+Correctness check of `SkyTileIndex` viewport queries against a brute-force scan of a random sky
+(with undefined positions and magnitudes), over random, wrapped (through RA 0, including boxes
+starting and ending in the same tile column), polar and full-RA boxes, with and without a star budget.
+
+    python -m benchmarks.tiles --stars 100000 --boxes 250
+
+The command exits with status 1 when a query returns other stars than the scan, or when a budgeted
+query exceeds its budget, skips a brighter star of the box or leaves its budget underfilled.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from exosky.index import SkyTileIndex
+
+# magnitudes closer than this may be cut together by the bisection of a budget
+MAGNITUDE_RESOLUTION = 1e-4
+
+
+def random_sky(stars: int, rng) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ra = rng.uniform(0, 360, stars).astype(np.float32)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, stars))).astype(np.float32)
+    magnitude = rng.uniform(-2, 10, stars).astype(np.float32)
+    for values in (ra, dec, magnitude):
+        values[rng.choice(stars, stars // 100, replace=False)] = np.nan
+    return ra, dec, magnitude
+
+
+def random_box(kind: str, rng) -> tuple[float, float, float, float]:
+    dec_min, dec_max = np.sort(rng.uniform(-90, 90, 2))
+    ra_min = rng.uniform(0, 360)
+    ra_max = (ra_min + rng.uniform(1, 120)) % 360
+    if kind == "wrapped":
+        # through RA 0, or all around it from just after the start, within the start tile column
+        ra_min, ra_max = (rng.uniform(180, 360), rng.uniform(0, 180)) if rng.random() < 0.5 else (ra_min, ra_min - 0.1)
+    elif kind == "polar":
+        dec_min, dec_max = (rng.uniform(30, 90), 90.0) if rng.random() < 0.5 else (-90.0, rng.uniform(-90, -30))
+    elif kind == "full RA":
+        ra_min, ra_max = rng.uniform(-180, 0), rng.uniform(360, 540)
+    return ra_min, ra_max, dec_min, dec_max
+
+
+def scan(ra, dec, magnitude, ra_min, ra_max, dec_min, dec_max, magnitude_limit=np.inf) -> np.ndarray:
+    """Indices of the stars of the box brighter than `magnitude_limit`, testing every star."""
+    with np.errstate(invalid="ignore"):
+        inside = (dec >= dec_min) & (dec <= dec_max) & (magnitude < magnitude_limit) & np.isfinite(ra)
+        if ra_max - ra_min < 360:
+            ra_min, ra_max = ra_min % 360, ra_max % 360
+            inside &= ((ra >= ra_min) & (ra <= ra_max)) if ra_min <= ra_max else ((ra >= ra_min) | (ra <= ra_max))
+    return np.flatnonzero(inside)
+
+
+def budget_errors(found, expected, magnitude, max_stars: int) -> list[str]:
+    errors = []
+    if len(found) > max_stars:
+        errors.append(f"{len(found)} stars over a budget of {max_stars}")
+    if not np.all(np.isin(found, expected)):
+        errors.append("stars outside of the box")
+    skipped = np.setdiff1d(expected, found)
+    if len(found) and len(skipped) and magnitude[skipped].min() < magnitude[found].max():
+        errors.append("a brighter star of the box skipped")
+    if len(found) < min(max_stars, len(expected)):
+        # only stars tied with the brightest skipped one, within the resolution, may be missing
+        cut = magnitude[skipped].min() + MAGNITUDE_RESOLUTION
+        if np.count_nonzero(magnitude[expected] <= cut) <= max_stars:
+            errors.append(f"{len(found)} stars for a budget of {max_stars} and {len(expected)} in the box")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stars", type=int, default=100000)
+    parser.add_argument("--boxes", type=int, default=250, help="number of boxes of every kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ra, dec, magnitude = random_sky(args.stars, rng)
+    index = SkyTileIndex(ra, dec, magnitude)
+    failures = []
+    for kind in ("random", "wrapped", "polar", "full RA"):
+        for _ in range(args.boxes):
+            box = random_box(kind, rng)
+            magnitude_limit = rng.choice([np.inf, rng.uniform(0, 10)])
+            expected = scan(ra, dec, magnitude, *box, magnitude_limit)
+            if not np.array_equal(index.query(*box, magnitude_limit=magnitude_limit), expected):
+                failures.append((kind, box, "other stars than the scan"))
+            max_stars = int(rng.integers(0, 2 * len(expected) + 2))
+            found = index.query(*box, max_stars=max_stars, magnitude_limit=magnitude_limit)
+            failures += [(kind, box, error) for error in budget_errors(found, expected, magnitude, max_stars)]
+
+    print(f"{args.stars} stars, level {index.level}, {args.boxes} boxes of every kind, with and without a budget")
+    for kind, box, error in failures[:10]:
+        print(f"{kind} box {tuple(round(float(bound), 3) for bound in box)}: {error}", file=sys.stderr)
+    if failures:
+        print(f"{len(failures)} queries differ from the scan", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
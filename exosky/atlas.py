@@ -0,0 +1,266 @@
+"""
+Headless batch rendering of the sky maps of many exoplanets, for serving as static assets.
+
+Exoplanets are split into chunks rendered by a pool of worker processes, each with its own
+`ExoplanetService` over the memory-mapped catalog cache. Images are written under
+`directory/<exoplanet>/<view>.png` and listed in `directory/manifest.json`; exoplanets whose
+images are listed there for the same catalog version and renderer are skipped, so a rerun only
+renders what is missing or stale.
+
+    python -m exosky.atlas atlas --max-distance 100 --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import pathlib
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+from exosky.query import DataLoader
+from exosky.raster import RasterVizualizer
+from exosky.service import ExoplanetService
+from exosky.vizualizer import MollweideVizualizer
+
+RENDERERS = {"matplotlib": MollweideVizualizer, "raster": RasterVizualizer}
+
+# service of a worker process, built once by `_init_worker`
+_worker_service = None
+
+
+def view_name(grid: bool, mollweide: bool, display_earth: bool) -> str:
+    """File name of a (grid, mollweide, display_earth) view, e.g. "grid-rectangular-earth"."""
+    parts = ["grid" if grid else "nogrid", "mollweide" if mollweide else "rectangular"]
+    return "-".join(parts + ["earth"] * display_earth)
+
+
+VIEWS = {view_name(*view): view for view in ExoplanetService.SKY_MAP_VIEWS}
+
+
+def exoplanet_directories(exoplanet_names) -> dict[str, str]:
+    """File-system safe directory name of every exoplanet, with a hash suffix where two would collide."""
+    slugs = {name: re.sub(r"[^A-Za-z0-9.+-]+", "_", name).strip("_.") or "_" for name in exoplanet_names}
+    counts = Counter(slugs.values())
+    return {
+        name: slug if counts[slug] == 1 else f"{slug}-{hashlib.sha1(name.encode()).hexdigest()[:8]}"
+        for name, slug in slugs.items()
+    }
+
+
+def make_service(cache_dir, renderer: str) -> ExoplanetService:
+    # every sky map is rendered once, there is nothing to gain from caching the images
+    return ExoplanetService(DataLoader(cache_dir), RENDERERS[renderer](), sky_map_cache_bytes=0)
+
+
+def _init_worker(cache_dir, renderer: str):
+    global _worker_service
+    _worker_service = make_service(cache_dir, renderer)
+    _worker_service.preload()
+
+
+def _render_worker(exoplanets, views, directory) -> list[tuple[str, dict]]:
+    return render_exoplanets(_worker_service, exoplanets, views, directory)
+
+
+def render_exoplanets(service: ExoplanetService, exoplanets, views, directory) -> list[tuple[str, dict]]:
+    """
+    Render the `views` of every (name, directory) of `exoplanets` under `directory`; returns their
+    image paths relative to `directory`, by view name, for every exoplanet.
+    """
+    rendered = []
+    for name, exoplanet_directory in exoplanets:
+        (directory / exoplanet_directory).mkdir(parents=True, exist_ok=True)
+        images = {}
+        for view in views:
+            path = pathlib.Path(exoplanet_directory, f"{view}.png")
+            _write(directory / path, service.render_sky_map(name, *VIEWS[view]))
+            images[view] = path.as_posix()
+        rendered.append((name, images))
+    return rendered
+
+
+def _write(path: pathlib.Path, data: bytes):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class SkyAtlas:
+    """
+    Sky maps of the archive exoplanets, rendered in `views` (names of `VIEWS`) into `directory`.
+
+    The catalogs are read from the `DataLoader` cache in `cache_dir` (fetched first if missing);
+    `renderer` is one of `RENDERERS`. Chunks of `chunk_size` exoplanets are rendered on `workers`
+    processes, or in-process with a single worker. The manifest is written after every chunk,
+    so an interrupted run resumes from the exoplanets it had not finished.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(
+        self,
+        directory,
+        cache_dir="tmp",
+        renderer: str = "matplotlib",
+        views=tuple(VIEWS),
+        workers: int = 4,
+        chunk_size: int = 4,
+    ):
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer: {renderer}, expected one of {tuple(RENDERERS)}")
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise ValueError(f"Unknown views: {sorted(unknown)}, expected some of {tuple(VIEWS)}")
+        self.directory = pathlib.Path(directory)
+        self.cache_dir = cache_dir
+        self.renderer = renderer
+        self.views = tuple(views)
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def run(
+        self,
+        min_distance: Optional[float] = None,
+        max_distance: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> dict:
+        """
+        Render the exoplanets within the distance range (the whole archive by default, nearest first)
+        whose images are missing or stale; returns counts of rendered and skipped exoplanets and the
+        throughput in exoplanets per second.
+        """
+        service = make_service(self.cache_dir, self.renderer)
+        service.preload()
+        exoplanets = service.get_exoplanets_within_distance(min_distance, max_distance, limit=limit)
+        directories = exoplanet_directories(service.get_exoplanets_within_distance()["pl_name"])
+
+        manifest = self._read_manifest(service)
+        entries = manifest["exoplanets"]
+        missing = [
+            (row.pl_name, directories[row.pl_name])
+            for row in exoplanets.itertuples()
+            if not self._is_up_to_date(entries.get(row.pl_name))
+        ]
+        details = exoplanets.set_index("pl_name")[["sy_dist", "ra", "dec"]]
+
+        start = time.perf_counter()
+        failures = []
+        chunks = [missing[i : i + self.chunk_size] for i in range(0, len(missing), self.chunk_size)]
+        done = 0
+        for chunk, result in self._render(service, chunks):
+            if isinstance(result, Exception):
+                failures.append((chunk, result))
+                continue
+            for name, images in result:
+                previous = entries.get(name, {}).get("images", {})
+                entries[name] = {
+                    **{column: float(value) for column, value in details.loc[name].items()},
+                    "images": {**previous, **images},
+                }
+            self._write_manifest(manifest)
+            done += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"{done}/{len(missing)} exoplanets rendered, {done / elapsed:.2f}/s", flush=True)
+
+        elapsed = time.perf_counter() - start
+        if failures:
+            chunk, error = failures[0]
+            raise RuntimeError(
+                f"{sum(len(chunk) for chunk, _ in failures)} of {len(missing)} exoplanets failed "
+                f"(first: {chunk[0][0]}); run the atlas again to resume"
+            ) from error
+        return {
+            "rendered_exoplanets": len(missing),
+            "skipped_exoplanets": len(exoplanets) - len(missing),
+            "images": len(missing) * len(self.views),
+            "seconds": round(elapsed, 3),
+            "exoplanets_per_second": round(len(missing) / elapsed, 3) if missing else None,
+        }
+
+    def _render(self, service: ExoplanetService, chunks):
+        """Yield every chunk with its rendered images, or the exception it failed with."""
+        if self.workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                try:
+                    yield chunk, render_exoplanets(service, chunk, self.views, self.directory)
+                except Exception as error:
+                    yield chunk, error
+            return
+
+        service.close()
+        # spawned workers do not inherit the threads (and locks) of the parent, unlike forked ones
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.cache_dir, self.renderer),
+        ) as executor:
+            futures = {
+                executor.submit(_render_worker, chunk, self.views, self.directory): chunk for chunk in chunks
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as error:
+                    yield futures[future], error
+
+    def _version(self, service: ExoplanetService) -> dict:
+        # what a sky map depends on besides its exoplanet and view, as in `render_sky_map`'s cache key
+        return {
+            "catalog": service.catalog_version,
+            "renderer": self.renderer,
+            "magnitude_threshold": float(service.vizualizer.magnitude_treshold),
+        }
+
+    def _read_manifest(self, service: ExoplanetService) -> dict:
+        version = self._version(service)
+        path = self.directory / self.MANIFEST_FILE
+        if path.exists():
+            manifest = json.loads(path.read_text())
+            if manifest.get("version") == version:
+                return manifest
+            print(f"{path} was rendered from {manifest.get('version')}, rendering every exoplanet again")
+        return {"version": version, "exoplanets": {}}
+
+    def _write_manifest(self, manifest: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write(self.directory / self.MANIFEST_FILE, json.dumps(manifest, indent=1).encode())
+
+    def _is_up_to_date(self, entry: Optional[dict]) -> bool:
+        if entry is None:
+            return False
+        images = entry["images"]
+        return all(view in images and (self.directory / images[view]).exists() for view in self.views)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="where images and the manifest are written; rerun to update")
+    parser.add_argument("--cache-dir", default="tmp", help="catalog cache of the DataLoader")
+    parser.add_argument("--min-distance", type=float, help="in parsecs")
+    parser.add_argument("--max-distance", type=float, help="in parsecs")
+    parser.add_argument("--limit", type=int, help="render at most the nearest LIMIT exoplanets of the range")
+    parser.add_argument("--views", nargs="+", choices=tuple(VIEWS), default=tuple(VIEWS))
+    parser.add_argument("--renderer", choices=tuple(RENDERERS), default="matplotlib")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=4, help="exoplanets per worker task")
+    args = parser.parse_args()
+
+    atlas = SkyAtlas(
+        args.directory,
+        cache_dir=args.cache_dir,
+        renderer=args.renderer,
+        views=args.views,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    print(atlas.run(args.min_distance, args.max_distance, args.limit))
+
+
+if __name__ == "__main__":
+    main()
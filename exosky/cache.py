@@ -0,0 +1,215 @@
+import hashlib
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def nbytes(value) -> int:
+    """Approximate memory footprint of a cached value: the sum of its NumPy buffers."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(item) for item in value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    # e.g. indexes exposing the size of their arrays
+    return getattr(value, "nbytes", 0)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by a memory budget in bytes.
+
+    Values are sized with `sizeof` (by default the total `nbytes` of their arrays).
+    A value larger than the whole budget is returned to the caller but not stored.
+    `on_evict(key, value)`, if given, is called for every evicted entry outside of the lock.
+    """
+
+    def __init__(self, max_bytes: int, sizeof=nbytes, on_evict=None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                evicted.append((key, value))
+            else:
+                self._entries[key] = (value, size)
+                self._size += size
+            while self._size > self.max_bytes:
+                evicted_key, (evicted_value, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+                evicted.append((evicted_key, evicted_value))
+        if self.on_evict is not None:
+            for evicted_key, evicted_value in evicted:
+                self.on_evict(evicted_key, evicted_value)
+        return value
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for `key`, calling `compute()` and storing its result on a miss.
+
+        Concurrent misses on the same key wait for the first caller instead of computing it again.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+
+        with self._lock:
+            key_lock = self._pending.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                with self._lock:
+                    value = self._entries[key][0] if key in self._entries else sentinel
+                if value is sentinel:
+                    value = self.put(key, compute())
+        finally:
+            with self._lock:
+                if self._pending.get(key) is key_lock:
+                    del self._pending[key]
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SpillCache:
+    """
+    Cache of encoded bytes (e.g. PNG images): an in-memory `LRUCache` of `max_bytes` whose evicted
+    entries spill to files in `directory`, which is itself trimmed to `max_disk_bytes` by dropping
+    the least recently used files. Without a `directory` it is a plain in-memory cache.
+
+    Keys must have a stable `repr`, which is hashed into the file name.
+    """
+
+    def __init__(self, max_bytes: int, directory=None, max_disk_bytes: int = 512 * 1024**2):
+        self.directory = pathlib.Path(directory) if directory is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_hits = 0
+        self._memory = LRUCache(max_bytes, sizeof=len, on_evict=self._spill)
+        self._disk_lock = threading.Lock()
+
+    def get(self, key, default=None):
+        value = self._memory.get(key, None)
+        if value is None:
+            value = self._read(key)
+            if value is None:
+                return default
+            self._memory.put(key, value)
+        return value
+
+    def put(self, key, value: bytes) -> bytes:
+        return self._memory.put(key, value)
+
+    def get_or_compute(self, key, compute) -> bytes:
+        def load_or_compute():
+            value = self._read(key)
+            return compute() if value is None else value
+
+        return self._memory.get_or_compute(key, load_or_compute)
+
+    def __contains__(self, key):
+        return key in self._memory or (self.directory is not None and self._path(key).exists())
+
+    def clear(self):
+        """Drop the in-memory entries; spilled files stay, they are keyed by content version."""
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        stats = self._memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        if self.directory is not None:
+            with self._disk_lock:
+                stats["disk_bytes"] = sum(path.stat().st_size for path in self._files())
+        return stats
+
+    def _path(self, key) -> pathlib.Path:
+        return self.directory / (hashlib.sha256(repr(key).encode()).hexdigest() + ".bin")
+
+    def _files(self):
+        return self.directory.glob("*.bin") if self.directory.exists() else []
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            value = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # keep recently read files away from trimming
+        self.disk_hits += 1
+        return value
+
+    def _spill(self, key, value: bytes):
+        if self.directory is None or len(value) > self.max_disk_bytes:
+            return
+        with self._disk_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(value)
+            os.replace(tmp_path, path)
+            self._trim()
+
+    def _trim(self):
+        files = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # removed by another process
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+class StarCatalog:
+    """
+    Compact, read-only star catalog.
+
+    Gaia source ids are kept as int64 and astrometry/photometry as float32: 28 bytes per star
+    (see `memory_usage`), against about 124 for the query DataFrame with float64 columns and
+    an object-dtype name holding one Python string per row.
+    Star names are the Gaia DR3 source ids, formatted only for the rows passed to `names`.
+    Columns are returned as read-only arrays without copying. The `DataLoader` caches the Gaia
+    columns in these dtypes (see `compact`), so a catalog built from its memory maps wraps them.
+    """
+
+    SOURCE_ID = "SOURCE_ID"
+    COLUMNS = ("ra", "dec", "parallax", "phot_g_mean_mag", "bp_rp")
+    DTYPES = {SOURCE_ID: np.int64, **dict.fromkeys(COLUMNS, np.float32)}
+
+    def __init__(self, source_id, ra, dec, parallax, phot_g_mean_mag, bp_rp):
+        self._columns = {self.SOURCE_ID: np.ascontiguousarray(source_id, dtype=np.int64)}
+        for column, values in zip(self.COLUMNS, (ra, dec, parallax, phot_g_mean_mag, bp_rp)):
+            self._columns[column] = np.ascontiguousarray(values, dtype=np.float32)
+        for column, values in self._columns.items():
+            if len(values) != len(self._columns[self.SOURCE_ID]):
+                raise ValueError(f"Column {column} has {len(values)} rows, expected {len(self)}")
+            values.setflags(write=False)
+
+    @classmethod
+    def compact(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        A Gaia query result with the catalog columns in the catalog's dtypes, without the `name` column
+        of older results (names are formatted from the source ids), other columns unchanged.
+        """
+        df = df.drop(columns="name", errors="ignore")
+        return df.astype({column: dtype for column, dtype in cls.DTYPES.items() if column in df.columns})
+
+    @classmethod
+    def is_compact(cls, df: pd.DataFrame) -> bool:
+        """Whether `df` is `compact`: `from_dataframe` can use its columns without copying them."""
+        return "name" not in df.columns and all(
+            column not in df.columns or df[column].dtype == dtype for column, dtype in cls.DTYPES.items()
+        )
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "StarCatalog":
+        """Build a catalog from a Gaia query result; a `name` column, if any, is dropped."""
+        return cls(df[cls.SOURCE_ID].to_numpy(), *(df[column].to_numpy() for column in cls.COLUMNS))
+
+    def __len__(self):
+        return len(self._columns[self.SOURCE_ID])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self._columns[column]
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return tuple(self._columns)
+
+    def names(self, indices=None) -> np.ndarray:
+        """Names of the stars at `indices` (all stars by default)."""
+        source_id = self._columns[self.SOURCE_ID]
+        return (source_id if indices is None else source_id[indices]).astype(str)
+
+    def to_dataframe(self, indices=None) -> pd.DataFrame:
+        """The catalog, or the rows at `indices`, as a DataFrame; without `indices` the columns are not copied."""
+        columns = {
+            column: values if indices is None else values[indices] for column, values in self._columns.items()
+        }
+        return pd.DataFrame(columns, copy=False)
+
+    def memory_usage(self) -> dict:
+        """Bytes held by every column, with the `total` and the `per_star` average."""
+        usage = {column: values.nbytes for column, values in self._columns.items()}
+        usage["total"] = sum(usage.values())
+        usage["per_star"] = usage["total"] / len(self) if len(self) else 0.0
+        return usage
@@ -0,0 +1,79 @@
+import json
+import os
+import pathlib
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = "columns.json"
+
+
+def _column_to_numpy(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_bool_dtype(series.dtype) and not series.hasnans:
+        return series.to_numpy(dtype=np.bool_)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        if series.hasnans and not pd.api.types.is_float_dtype(series.dtype):
+            # nullable integers (e.g. Int64 from astropy masked columns) -> float with NaN
+            return series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return series.to_numpy()
+    # strings are stored as fixed-width unicode, which numpy can memory map
+    return series.fillna("").astype(str).to_numpy(dtype=str)
+
+
+def save_columns(df: pd.DataFrame, path: pathlib.Path, metadata: dict | None = None) -> None:
+    """
+    Store a DataFrame as a directory with one `.npy` file per column, and optional JSON `metadata`.
+
+    The directory is written next to its final location under a name unique to the writer and
+    renamed into place, so readers never see a partially written cache.
+    """
+    path = pathlib.Path(path)
+    suffix = f"{os.getpid()}.{threading.get_ident()}"
+    tmp_path = path.with_name(f"{path.name}.{suffix}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    columns = []
+    for i, column in enumerate(df.columns):
+        filename = f"{i:03d}.npy"
+        np.save(tmp_path / filename, _column_to_numpy(df[column]), allow_pickle=False)
+        columns.append({"name": str(column), "file": filename})
+    manifest = {"columns": columns, "rows": len(df), "metadata": metadata or {}}
+    (tmp_path / MANIFEST).write_text(json.dumps(manifest))
+
+    # a directory cannot replace another one, move the old version out of the way first;
+    # memory maps of its files stay valid after it is removed
+    old_path = path.with_name(f"{path.name}.{suffix}.old")
+    try:
+        path.rename(old_path)
+    except FileNotFoundError:
+        pass
+    tmp_path.rename(path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def load_columns(path: pathlib.Path, mmap: bool = True) -> pd.DataFrame:
+    """
+    Open a directory written by `save_columns`.
+
+    With `mmap=True` the numeric columns are read-only memory maps backed by the page cache,
+    so loading is O(number of columns) and the data is shared between processes.
+    """
+    path = pathlib.Path(path)
+    manifest = json.loads((path / MANIFEST).read_text())
+    data = {
+        column["name"]: np.load(path / column["file"], mmap_mode="r" if mmap else None, allow_pickle=False)
+        for column in manifest["columns"]
+    }
+    return pd.DataFrame(data, copy=False)
+
+
+def read_metadata(path: pathlib.Path) -> dict:
+    """The `metadata` stored by `save_columns` (empty for directories written without it)."""
+    return json.loads((pathlib.Path(path) / MANIFEST).read_text()).get("metadata", {})
+
+
+def has_columns(path: pathlib.Path) -> bool:
+    return (pathlib.Path(path) / MANIFEST).exists()
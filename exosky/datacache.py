@@ -0,0 +1,145 @@
+"""
+On-disk cache of query results, keyed by the query parameters and safe to share between processes.
+
+Every entry is a columnar directory (see `exosky.columnar`) named after a hash of its parameters,
+written atomically and fetched by a single process at a time thanks to a lock file next to it.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import time
+from typing import Optional
+
+import pandas as pd
+
+from exosky.columnar import has_columns, load_columns, read_metadata, save_columns
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock on `path`, across processes and threads; waits up to `timeout` seconds (forever by default)."""
+
+    def __init__(self, path, timeout: Optional[float] = None, poll_interval: float = 0.1):
+        self.path = pathlib.Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._file = None
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        file = open(self.path, "a+b")
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    file.close()
+                    raise TimeoutError(f"Could not lock {self.path} within {self.timeout} s")
+                time.sleep(self.poll_interval)
+        self._file = file
+
+    def release(self):
+        file, self._file = self._file, None
+        if file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        file.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def parameters_key(name: str, params: dict) -> str:
+    """Stable short hash of a query name and its parameters."""
+    payload = json.dumps({"name": name, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+class DataCache:
+    """
+    Query results stored under `directory` as `<name>-<hash of params>.columns`.
+
+    `load` returns the cached DataFrame, or fetches it when it is missing, older than `max_age`
+    seconds (never expires by default) or a `refresh` is requested. Only one process fetches a
+    given entry: the others wait on its lock and then read what it wrote. When a refetch of an
+    expired entry fails, the stale entry is served instead of failing.
+    """
+
+    def __init__(self, directory, mmap: bool = True, max_age: Optional[float] = None, lock_timeout=None):
+        self.directory = pathlib.Path(directory)
+        self.mmap = mmap
+        self.max_age = max_age
+        self.lock_timeout = lock_timeout
+
+    def path(self, name: str, params: dict) -> pathlib.Path:
+        return self.directory / f"{name}-{parameters_key(name, params)}.columns"
+
+    def load(self, name: str, params: dict, fetch, refresh: bool = False) -> pd.DataFrame:
+        path = self.path(name, params)
+        requested = time.time()
+        if not refresh and self._is_fresh(path):
+            return load_columns(path, mmap=self.mmap)
+
+        with FileLock(path.with_name(path.name + ".lock"), timeout=self.lock_timeout):
+            # another process may have fetched the entry while we were waiting for the lock
+            if self._is_fresh(path) and (not refresh or self._created(path) >= requested):
+                return load_columns(path, mmap=self.mmap)
+            try:
+                df = fetch()
+            except Exception as error:
+                if not has_columns(path):
+                    raise
+                print(f"Refreshing {name} failed, serving the cached copy: {error!r}")
+                return load_columns(path, mmap=self.mmap)
+            save_columns(df, path, metadata={"name": name, "params": params, "created": time.time()})
+        return load_columns(path, mmap=self.mmap)
+
+    def rewrite(self, name: str, params: dict, convert) -> pd.DataFrame:
+        """
+        Replace the cached entry with `convert(entry)`, e.g. to store it in another format, keeping its
+        metadata and so its `version`; `convert` returns None when the entry needs no change.
+        """
+        path = self.path(name, params)
+        with FileLock(path.with_name(path.name + ".lock"), timeout=self.lock_timeout):
+            converted = convert(load_columns(path, mmap=False))
+            if converted is not None:
+                save_columns(converted, path, metadata=read_metadata(path))
+        return load_columns(path, mmap=self.mmap)
+
+    def version(self, name: str, params: dict) -> str:
+        """Id of the cached entry, changing whenever it is fetched again; empty when it is not cached."""
+        path = self.path(name, params)
+        if not has_columns(path):
+            return ""
+        return f"{parameters_key(name, params)}@{self._created(path)!r}"
+
+    def _created(self, path: pathlib.Path) -> float:
+        created = read_metadata(path).get("created")
+        # entries written without metadata date from their manifest
+        return created if created is not None else os.path.getmtime(path)
+
+    def _is_fresh(self, path: pathlib.Path) -> bool:
+        if not has_columns(path):
+            return False
+        return self.max_age is None or time.time() - self._created(path) <= self.max_age
@@ -0,0 +1,147 @@
+"""
+Fly-through animations of the sky as the observer travels from Earth to an exoplanet.
+
+Frames are projected by `ExoplanetService.fly_through` (one streamed projection per position)
+and rendered by the vizualizer, then written by a frame writer as they are produced: a video
+through an `ffmpeg` process, or a numbered PNG sequence.
+
+    python -m exosky.flythrough "Kepler-138 c" kepler-138.mp4 --frames 300 --fps 30 --renderer raster
+"""
+
+import argparse
+import pathlib
+import shutil
+import subprocess
+import time
+
+import numpy as np
+from PIL import Image
+
+from exosky.atlas import RENDERERS, make_service
+
+VIDEO_SUFFIXES = (".mp4", ".mkv", ".mov", ".webm")
+
+
+class ImageSequenceWriter:
+    """Writes every frame as `directory/frame-00000.png`, `frame-00001.png`, ..."""
+
+    def __init__(self, directory, pattern: str = "frame-{:05d}.png"):
+        self.directory = pathlib.Path(directory)
+        self.pattern = pattern
+        self.frames = 0
+
+    def write(self, frame: np.ndarray):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # low compression, as for the raster sky maps: encoding time dominates otherwise
+        Image.fromarray(frame).save(self.directory / self.pattern.format(self.frames), compress_level=1)
+        self.frames += 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FFmpegWriter:
+    """
+    Encodes frames to a video file by piping raw RGB frames to an `ffmpeg` process, started with the
+    size of the first frame. Odd frame sizes are padded to even ones, as most codecs require.
+    """
+
+    def __init__(self, path, fps: float = 30, codec: str = "libx264", ffmpeg: str = "ffmpeg"):
+        self.executable = shutil.which(ffmpeg)
+        if self.executable is None:
+            raise RuntimeError(f"{ffmpeg} was not found on the PATH, write an image sequence instead")
+        self.path = pathlib.Path(path)
+        self.fps = fps
+        self.codec = codec
+        self.frames = 0
+        self._process = None
+
+    def write(self, frame: np.ndarray):
+        if self._process is None:
+            self._process = self._start(frame.shape[1], frame.shape[0])
+        self._process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        self.frames += 1
+
+    def close(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.path}: {process.stderr.read().decode()[-2000:]}")
+        process.stderr.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start(self, width: int, height: int) -> subprocess.Popen:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # ffmpeg's stderr is only read once it exits, so keep it quiet enough not to fill the pipe
+        # fmt: off
+        command = [
+            self.executable, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", self.codec, "-pix_fmt", "yuv420p",
+            str(self.path),
+        ]
+        # fmt: on
+        return subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def frame_writer(path, fps: float = 30):
+    """`FFmpegWriter` for a video file name (see `VIDEO_SUFFIXES`), `ImageSequenceWriter` for a directory."""
+    path = pathlib.Path(path)
+    if path.suffix.lower() in VIDEO_SUFFIXES:
+        return FFmpegWriter(path, fps)
+    return ImageSequenceWriter(path)
+
+
+def write_frames(frames, writer) -> dict:
+    """Write `frames` as they are produced; returns the frame count and the achieved frames per second."""
+    start = time.perf_counter()
+    count = 0
+    with writer:
+        for frame in frames:
+            writer.write(frame)
+            count += 1
+    elapsed = time.perf_counter() - start
+    return {"frames": count, "seconds": round(elapsed, 3), "frames_per_second": round(count / elapsed, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("exoplanet", help="name of the exoplanet to fly to")
+    parser.add_argument("output", help=f"video file ({', '.join(VIDEO_SUFFIXES)}) or directory of PNG frames")
+    parser.add_argument("--cache-dir", default="tmp", help="catalog cache of the DataLoader")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=30, help="frame rate of the video")
+    parser.add_argument("--renderer", choices=tuple(RENDERERS), default="raster")
+    parser.add_argument("--mollweide", action="store_true")
+    parser.add_argument("--no-grid", action="store_true")
+    parser.add_argument("--hide-host", action="store_true", help="leave out the host star, as in its sky map")
+    args = parser.parse_args()
+
+    service = make_service(args.cache_dir, args.renderer)
+    service.preload()
+    positions = service.flight_path(args.exoplanet, args.frames)
+    hidden_stars = service.host_star_indices(args.exoplanet) if args.hide_host else None
+    frames = service.render_fly_through(
+        positions,
+        grid=not args.no_grid,
+        mollweide=args.mollweide,
+        hidden_stars=hidden_stars,
+    )
+    print(write_frames(frames, frame_writer(args.output, args.fps)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+import numpy as np
+
+
+class NameIndex:
+    """
+    Exact and type-ahead lookups over a column of names.
+
+    Exact lookups go through a dict of name -> first row position. Searches are case-insensitive:
+    prefix matches are found by binary search over the sorted lowercased names and come first,
+    followed by substring matches, both in alphabetical order.
+    """
+
+    def __init__(self, names):
+        self.positions = {}
+        for position, name in enumerate(names):
+            self.positions.setdefault(name, position)
+
+        unique_names = np.array(list(self.positions), dtype=str)
+        lowered = np.char.lower(unique_names)
+        order = np.argsort(lowered, kind="stable")
+        self._sorted_names = unique_names[order]
+        self._sorted_lowered = lowered[order]
+
+    def __getitem__(self, name) -> int:
+        return self.positions[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self.positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def search(self, query: str, limit: int = 20) -> list[str]:
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        start = np.searchsorted(self._sorted_lowered, query, side="left")
+        stop = np.searchsorted(self._sorted_lowered, query + "\U0010ffff", side="left")
+        matches = [str(name) for name in self._sorted_names[start : min(stop, start + limit)]]
+        if len(matches) == limit:
+            return matches
+
+        for position, name in enumerate(self._sorted_lowered):
+            if query in name and not start <= position < stop:
+                matches.append(str(self._sorted_names[position]))
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+def visibility_radius(magnitude_threshold: float, absolute_magnitude):
+    """Distance in parsecs within which a star of `absolute_magnitude` is brighter than `magnitude_threshold`."""
+    return 10 ** ((magnitude_threshold - np.asarray(absolute_magnitude)) / 5 + 1)
+
+
+class VisibilityIndex:
+    """
+    Spatial index answering "which stars can be brighter than a threshold from this viewpoint".
+
+    A star of absolute magnitude M is visible below threshold T only within its visibility radius
+    `visibility_radius(T, M)`. Stars are grouped into classes of `magnitude_step` in M (radii within
+    a factor of 2 for the default step), and each class is bucketed on a uniform grid whose cell size
+    is the class' largest radius at `reference_threshold`. A query scans the few cells around the
+    viewpoint in every class, so its cost scales with the nearby candidates, not the catalog size.
+    Stars with an undefined position or magnitude are never returned.
+    """
+
+    CELL_BITS = 21
+    CELL_LIMIT = 2 ** (CELL_BITS - 1)
+
+    def __init__(self, xyz, absolute_magnitude, reference_threshold: float = 10, magnitude_step: float = 1.5):
+        self.xyz = xyz
+        self.absolute_magnitude = absolute_magnitude
+        # visibility_radius(T, M) ** 2 == 10 ** (T / 2.5 + 2) * 10 ** (-M / 2.5), the second factor is per star
+        with np.errstate(over="ignore"):
+            self._luminosity = 10 ** (-np.asarray(absolute_magnitude, dtype=np.float64) / 2.5)
+        self._classes = []
+
+        (valid,) = np.nonzero(np.isfinite(absolute_magnitude) & np.all(np.isfinite(xyz), axis=0))
+        if not len(valid):
+            return
+        brightest = absolute_magnitude[valid].min()
+        classes = np.floor((absolute_magnitude[valid] - brightest) / magnitude_step).astype(np.int64)
+        for magnitude_class in np.unique(classes):
+            members = valid[classes == magnitude_class]
+            class_brightest = brightest + magnitude_class * magnitude_step
+            cell_size = float(visibility_radius(reference_threshold, class_brightest))
+            keys = self._cell_keys(np.floor(xyz[:, members] / cell_size).astype(np.int64))
+            order = np.argsort(keys, kind="stable")
+            self._classes.append((class_brightest, cell_size, keys[order], members[order]))
+
+    def query(self, viewpoint, magnitude_threshold: float) -> np.ndarray:
+        """Sorted indices of the stars whose visibility sphere contains `viewpoint`."""
+        viewpoint = np.asarray(viewpoint, dtype=np.float64).reshape(3)
+        candidates = self.candidates(viewpoint, magnitude_threshold)
+        # exact test, with a little slack so that the final magnitude cut decides borderline stars
+        squared_radius = self._luminosity[candidates] * (10 ** (magnitude_threshold / 2.5 + 2) * (1 + 1e-9))
+        offset = self.xyz.take(candidates, axis=1) - viewpoint[:, np.newaxis]
+        visible = np.einsum("ij,ij->j", offset, offset) < squared_radius
+        return candidates[visible]
+
+    def candidates(self, viewpoint, magnitude_threshold: float) -> np.ndarray:
+        """
+        Sorted indices of the stars in the grid cells that can see `viewpoint`: a cheap superset of `query`
+        for callers that apply the magnitude cut themselves.
+        """
+        viewpoint = np.asarray(viewpoint, dtype=np.float64).reshape(3)
+        candidates = [np.empty(0, dtype=np.int64)]
+        for class_brightest, cell_size, keys, members in self._classes:
+            span = int(np.ceil(visibility_radius(magnitude_threshold, class_brightest) / cell_size))
+            center = np.floor(viewpoint / cell_size).astype(np.int64)
+            if (2 * span + 1) ** 3 >= len(members) or np.any(np.abs(center) + span >= self.CELL_LIMIT - 1):
+                # scanning the whole class is cheaper (or the grid does not reach the viewpoint)
+                candidates.append(members)
+                continue
+            steps = np.arange(-span, span + 1)
+            cells = np.stack(np.meshgrid(steps, steps, steps, indexing="ij")).reshape(3, -1) + center[:, np.newaxis]
+            cell_keys = self._cell_keys(cells)
+            starts = np.searchsorted(keys, cell_keys, side="left")
+            stops = np.searchsorted(keys, cell_keys, side="right")
+            candidates.extend(members[start:stop] for start, stop in zip(starts, stops) if start < stop)
+        return np.sort(np.concatenate(candidates))
+
+    @classmethod
+    def _cell_keys(cls, cells: np.ndarray) -> np.ndarray:
+        # far away cells are clamped to the border of the grid; queries near the border scan the class
+        cells = np.clip(cells, -cls.CELL_LIMIT + 1, cls.CELL_LIMIT - 1) + cls.CELL_LIMIT
+        return (cells[0] << (2 * cls.CELL_BITS)) | (cells[1] << cls.CELL_BITS) | cells[2]
+
+
+class SkyTileIndex:
+    """
+    Stars of one sky (e.g. the projection seen from an exoplanet) bucketed into equal-area tiles,
+    for viewport queries.
+
+    At `level` the sky is split into 2**level bands of equal height in sin(dec), each cut into
+    2**(level + 1) tiles of equal width in RA, so that, as in HEALPix, every tile covers the same
+    solid angle (the level is picked for about `STARS_PER_TILE` stars per tile by default).
+    Stars are sorted by tile and then by magnitude, so the stars of a tile brighter than a limit
+    are a prefix of its range, counted with a binary search. A box query only touches the tiles
+    it overlaps: tiles entirely inside the box are counted by binary search and only the stars of
+    the tiles on its border are tested one by one. A star budget is met by searching the magnitude
+    limit over those counts of stars inside the box, so its cost follows the visible region and the
+    returned stars, not the size of the sky.
+    Stars with an undefined position or magnitude are never returned.
+    """
+
+    STARS_PER_TILE = 64
+    MAX_LEVEL = 9
+
+    def __init__(self, ra, dec, magnitude, level: int | None = None):
+        self.ra = np.asarray(ra)
+        self.dec = np.asarray(dec)
+        self.magnitude = np.asarray(magnitude)
+        (valid,) = np.nonzero(np.isfinite(self.ra) & np.isfinite(self.dec) & np.isfinite(self.magnitude))
+        if level is None:
+            tiles_needed = max(len(valid) / self.STARS_PER_TILE / 2, 1)
+            level = min(int(np.ceil(np.log(tiles_needed) / np.log(4))), self.MAX_LEVEL)
+        self.level = level
+        self.bands = 2**level
+        self.columns = 2 ** (level + 1)
+
+        magnitude = self.magnitude[valid].astype(np.float64)
+        self._magnitude_min = magnitude.min() if len(valid) else 0.0
+        # keys are tile + magnitude offset, with offsets below 1 tile (`_magnitude_span`) apart
+        self._magnitude_span = (magnitude.max() - self._magnitude_min + 1) if len(valid) else 1.0
+        keys = self._tiles(self.ra[valid], self.dec[valid]) * self._magnitude_span + (magnitude - self._magnitude_min)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._members = valid[order]
+
+    @property
+    def nbytes(self) -> int:
+        return self._keys.nbytes + self._members.nbytes
+
+    def __len__(self):
+        return len(self._members)
+
+    def query(
+        self,
+        ra_min: float,
+        ra_max: float,
+        dec_min: float,
+        dec_max: float,
+        max_stars: int | None = None,
+        magnitude_limit: float = np.inf,
+    ) -> np.ndarray:
+        """
+        Sorted indices of the stars brighter than `magnitude_limit` inside the box (degrees, bounds
+        included; `ra_min > ra_max` wraps through 0). With `max_stars`, the limit is lowered until
+        at most that many stars are returned, keeping the brightest ones.
+        """
+        full_ra = ra_max - ra_min >= 360
+        ra_min, ra_max = (0.0, 360.0) if full_ra else (ra_min % 360, ra_max % 360)
+        tiles = self._box_tiles(ra_min, ra_max, dec_min, dec_max, full_ra)
+        interior = self._interior(tiles, ra_min, ra_max, dec_min, dec_max, full_ra)
+        inner_tiles, border_tiles = tiles[interior], tiles[~interior]
+
+        # every star of an inner tile is in the box and they are counted by binary search; the stars
+        # of the border tiles are tested one by one and kept with their key and the base key of their tile
+        inner_starts = np.searchsorted(self._keys, inner_tiles * self._magnitude_span, side="left")
+        border_starts = np.searchsorted(self._keys, border_tiles * self._magnitude_span, side="left")
+        border_stops = self._stops(border_tiles, magnitude_limit)
+        positions = self._positions(border_starts, border_stops)
+        bases = np.repeat(border_tiles * self._magnitude_span, border_stops - border_starts)
+        candidates = self._members[positions]
+        ra, dec = self.ra[candidates], self.dec[candidates]
+        inside = (dec >= dec_min) & (dec <= dec_max)
+        if not full_ra:
+            inside &= ((ra >= ra_min) & (ra <= ra_max)) if ra_min <= ra_max else ((ra >= ra_min) | (ra <= ra_max))
+        border_keys, border_bases, border_members = self._keys[positions[inside]], bases[inside], candidates[inside]
+
+        def count(limit: float) -> int:
+            inner = (self._stops(inner_tiles, limit) - inner_starts).sum()
+            return int(inner + np.count_nonzero(border_keys < border_bases + self._offset(limit)))
+
+        if max_stars is not None and count(magnitude_limit) > max_stars:
+            magnitude_limit = self._limit_for(count, max(max_stars, 0), magnitude_limit)
+        positions = self._positions(inner_starts, self._stops(inner_tiles, magnitude_limit))
+        border = border_members[border_keys < border_bases + self._offset(magnitude_limit)]
+        return np.sort(np.concatenate([self._members[positions], border]))
+
+    def _tiles(self, ra, dec) -> np.ndarray:
+        band = np.floor((np.sin(np.radians(dec)) + 1) / 2 * self.bands).astype(np.int64)
+        column = np.floor(np.mod(ra, 360) / 360 * self.columns).astype(np.int64)
+        return np.clip(band, 0, self.bands - 1) * self.columns + np.clip(column, 0, self.columns - 1)
+
+    def _box_tiles(self, ra_min, ra_max, dec_min, dec_max, full_ra: bool) -> np.ndarray:
+        first_band, last_band = self._tiles(0.0, np.clip([dec_min, dec_max], -90, 90)) // self.columns
+        first_column, last_column = self._tiles([ra_min, ra_max], 0.0) % self.columns
+        span = (last_column - first_column) % self.columns
+        if full_ra or (ra_min > ra_max and span == 0):
+            # a box wrapping through 0 from and to the same column covers all of them, each one once
+            columns = np.arange(self.columns)
+        else:
+            columns = np.arange(first_column, first_column + span + 1) % self.columns
+        return (np.arange(first_band, last_band + 1)[:, np.newaxis] * self.columns + columns).ravel()
+
+    def _interior(self, tiles, ra_min, ra_max, dec_min, dec_max, full_ra: bool) -> np.ndarray:
+        """Whether every tile lies entirely inside the box, with a little margin against rounding."""
+        margin = 1e-9
+        band, column = tiles // self.columns, tiles % self.columns
+        band_edges = np.degrees(np.arcsin(np.clip(2 * np.arange(self.bands + 1) / self.bands - 1, -1, 1)))
+        inside = (band_edges[band] >= dec_min + margin) & (band_edges[band + 1] <= dec_max - margin)
+        if full_ra:
+            return inside
+        tile_ra_min, tile_ra_max = column * 360 / self.columns, (column + 1) * 360 / self.columns
+        if ra_min <= ra_max:
+            return inside & (tile_ra_min >= ra_min + margin) & (tile_ra_max <= ra_max - margin)
+        return inside & ((tile_ra_min >= ra_min + margin) | (tile_ra_max <= ra_max - margin))
+
+    @staticmethod
+    def _positions(starts, stops) -> np.ndarray:
+        """Concatenation of the [start:stop] ranges of every tile in the sorted keys and members."""
+        lengths = stops - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(lengths.sum())
+
+    def _offset(self, magnitude_limit: float) -> float:
+        # key offset of `magnitude_limit` within a tile; beyond the faintest star it covers the whole tile
+        return np.clip(magnitude_limit - self._magnitude_min, 0, self._magnitude_span - 0.5)
+
+    def _stops(self, tiles, magnitude_limit: float) -> np.ndarray:
+        """End of the stars of every tile brighter than `magnitude_limit` in the sorted members."""
+        return np.searchsorted(self._keys, tiles * self._magnitude_span + self._offset(magnitude_limit), side="left")
+
+    def _limit_for(self, count, max_stars: int, magnitude_limit: float) -> float:
+        # largest limit keeping at most max_stars in the box, by bisection down to ~1e-5 magnitudes
+        low = self._magnitude_min
+        high = min(magnitude_limit, self._magnitude_min + self._magnitude_span)
+        for _ in range(24):
+            middle = (low + high) / 2
+            if count(middle) > max_stars:
+                high = middle
+            else:
+                low = middle
+        return low
+
+
+class NearestStarIndex:
+    """
+    Nearest-neighbour matches of sky positions against a star catalog, e.g. exoplanet hosts to Gaia sources.
+
+    Stars are bucketed on a uniform grid over their unit vectors, with cells at least as large as the
+    chord of `max_separation` (arcseconds), and sorted by cell. A query position only looks at the
+    stars of the 27 cells around its own, found by binary search, so matching m positions costs
+    O(m log n) instead of comparing them with all n stars. Stars with an undefined position are never
+    matched.
+    """
+
+    CELL_BITS = 21
+
+    def __init__(self, ra, dec, distance=None, max_separation: float = 10):
+        self.max_separation = max_separation
+        self.distance = None if distance is None else np.asarray(distance, dtype=np.float64)
+        xyz = self._unit_vectors(ra, dec)
+        (valid,) = np.nonzero(np.all(np.isfinite(xyz), axis=0))
+        # the cells cover [-1, 1] with 2**CELL_BITS of them per axis at most, so keys fit in an int64
+        self._max_chord = 2 * np.sin(np.radians(max_separation / 3600) / 2)
+        self.cell_size = max(self._max_chord, 2 / (2**self.CELL_BITS - 2))
+        keys = self._cell_keys(self._cells(xyz[:, valid]))
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._members = valid[order]
+        self._xyz = xyz[:, self._members]
+
+    def __len__(self):
+        return len(self._members)
+
+    def query(self, ra, dec, distance=None, distance_tolerance: float = 0.2) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Index of the star nearest to every position (degrees) within `max_separation`, or -1, and its
+        separation in arcseconds (NaN without a match). With a `distance` per position (parsecs) and
+        star distances, stars whose distance differs by more than `distance_tolerance` (relative) are
+        not matched; positions or stars with an unknown distance skip that test.
+        """
+        xyz = self._unit_vectors(ra, dec)
+        count = xyz.shape[1]
+        indices = np.full(count, -1, dtype=np.int64)
+        separation = np.full(count, np.nan)
+        (valid,) = np.nonzero(np.all(np.isfinite(xyz), axis=0))
+
+        steps = np.arange(-1, 2)
+        neighbours = np.stack(np.meshgrid(steps, steps, steps, indexing="ij")).reshape(3, 1, -1)
+        cell_keys = self._cell_keys(self._cells(xyz[:, valid])[:, :, np.newaxis] + neighbours)
+        starts = np.searchsorted(self._keys, cell_keys, side="left").ravel()
+        lengths = np.searchsorted(self._keys, cell_keys, side="right").ravel() - starts
+        # concatenation of the sorted[start:stop] ranges of every neighbouring cell, and their position
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        candidates = offsets + np.arange(lengths.sum())
+        owners = valid[np.repeat(np.arange(len(valid)).repeat(neighbours.shape[2]), lengths)]
+
+        chord_squared = ((self._xyz[:, candidates] - xyz[:, owners]) ** 2).sum(axis=0)
+        accepted = chord_squared <= self._max_chord**2
+        candidates = self._members[candidates]
+        if distance is not None and self.distance is not None:
+            distance = np.broadcast_to(np.asarray(distance, dtype=np.float64), (count,))[owners]
+            star_distance = self.distance[candidates]
+            with np.errstate(invalid="ignore"):
+                mismatch = np.abs(star_distance - distance) > distance_tolerance * distance
+            accepted &= ~mismatch
+
+        # nearest accepted candidate of every position: the first one once sorted by position, then chord
+        order = np.lexsort((chord_squared[accepted], owners[accepted]))
+        owners, candidates = owners[accepted][order], candidates[accepted][order]
+        chord_squared = chord_squared[accepted][order]
+        first = np.ones(len(owners), dtype=bool)
+        first[1:] = owners[1:] != owners[:-1]
+        indices[owners[first]] = candidates[first]
+        separation[owners[first]] = np.degrees(2 * np.arcsin(np.sqrt(chord_squared[first]) / 2)) * 3600
+        return indices, separation
+
+    @staticmethod
+    def _unit_vectors(ra, dec) -> np.ndarray:
+        ra = np.radians(np.atleast_1d(np.asarray(ra, dtype=np.float64)))
+        dec = np.radians(np.atleast_1d(np.asarray(dec, dtype=np.float64)))
+        return np.stack((np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)))
+
+    def _cells(self, xyz) -> np.ndarray:
+        return np.floor((xyz + 1) / self.cell_size).astype(np.int64)
+
+    @classmethod
+    def _cell_keys(cls, cells: np.ndarray) -> np.ndarray:
+        # neighbours of the border cells fall outside of the grid, clip them onto empty border cells
+        cells = np.clip(cells, 0, 2**cls.CELL_BITS - 1)
+        return (cells[0] << (2 * cls.CELL_BITS)) | (cells[1] << cls.CELL_BITS) | cells[2]
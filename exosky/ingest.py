@@ -0,0 +1,181 @@
+"""
+Paginated, resumable ingestion of large Gaia catalogs.
+
+The sky is split into HEALPix pixels, which map to contiguous Gaia `source_id` ranges
+(source_id // 2**35 is the level 12 HEALPix index of the source). Every pixel is queried
+as one page and written to its own columnar shard as soon as it arrives, so an interrupted
+run resumes from the missing pages only.
+
+    python -m exosky.ingest tmp/gaia_ingest --healpix-level 4 --magnitude-limit 17 --workers 8
+"""
+
+import argparse
+import json
+import pathlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+import pandas as pd
+
+from exosky.columnar import has_columns, load_columns, save_columns
+
+GAIA_COLUMNS = ("source_id", "ra", "dec", "parallax", "phot_g_mean_mag", "bp_rp")
+SOURCE_ID_HEALPIX_SHIFT = 35  # source_id // 2**35 is the HEALPix level 12 index
+MAX_HEALPIX_LEVEL = 12
+
+
+class Page(NamedTuple):
+    """One HEALPix pixel of the ingestion: sources with `source_id_min <= source_id < source_id_max`."""
+
+    index: int
+    source_id_min: int
+    source_id_max: int
+
+
+def healpix_pages(level: int) -> list[Page]:
+    if not 0 <= level <= MAX_HEALPIX_LEVEL:
+        raise ValueError(f"HEALPix level must be between 0 and {MAX_HEALPIX_LEVEL}, got {level}")
+    shift = SOURCE_ID_HEALPIX_SHIFT + 2 * (MAX_HEALPIX_LEVEL - level)
+    return [Page(pixel, pixel << shift, (pixel + 1) << shift) for pixel in range(12 * 4**level)]
+
+
+class GaiaTapBackend:
+    """Fetches pages from the Gaia archive TAP service through astroquery."""
+
+    def __init__(self, table: str = "gaiadr3.gaia_source"):
+        self.table = table
+
+    def query(self, page: Page, magnitude_limit: float) -> str:
+        return f"""SELECT {", ".join(GAIA_COLUMNS)}
+            FROM {self.table}
+            WHERE phot_g_mean_mag < {magnitude_limit}
+            AND source_id >= {page.source_id_min} AND source_id < {page.source_id_max}
+            """
+
+    def fetch_page(self, page: Page, magnitude_limit: float) -> pd.DataFrame:
+        from astroquery.gaia import Gaia
+
+        # async jobs are not truncated to the synchronous row limit
+        job = Gaia.launch_job_async(self.query(page, magnitude_limit))
+        return job.get_results().to_pandas()
+
+
+class DataFrameBackend:
+    """Serves pages from an in-memory catalog, a stand-in for the TAP service in offline runs."""
+
+    def __init__(self, df: pd.DataFrame, source_id_column: str = "SOURCE_ID"):
+        self.df = df
+        self.source_id_column = source_id_column
+
+    def fetch_page(self, page: Page, magnitude_limit: float) -> pd.DataFrame:
+        source_id = self.df[self.source_id_column]
+        selected = (
+            (source_id >= page.source_id_min)
+            & (source_id < page.source_id_max)
+            & (self.df["phot_g_mean_mag"] < magnitude_limit)
+        )
+        return self.df[selected].reset_index(drop=True)
+
+
+class GaiaIngestion:
+    """
+    Downloads the Gaia sources brighter than `magnitude_limit` page by page into `directory`.
+
+    `backend` is any object with `fetch_page(page, magnitude_limit) -> DataFrame`
+    (`GaiaTapBackend` by default). Pages run on `workers` threads, each is written as a shard
+    under `directory/shards` when it arrives, and pages whose shard exists are skipped,
+    so calling `run` again after an interruption only fetches what is missing.
+    """
+
+    SETTINGS_FILE = "ingestion.json"
+
+    def __init__(
+        self,
+        directory,
+        backend=None,
+        magnitude_limit: float = 15,
+        healpix_level: int = 3,
+        workers: int = 4,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.backend = backend if backend is not None else GaiaTapBackend()
+        self.magnitude_limit = magnitude_limit
+        self.healpix_level = healpix_level
+        self.workers = workers
+        self.pages = healpix_pages(healpix_level)
+
+    def run(self) -> dict:
+        """Fetch the missing pages; returns counts of fetched and skipped pages and fetched rows."""
+        self._check_settings()
+        missing = [page for page in self.pages if not has_columns(self._shard_path(page))]
+        rows = 0
+        failures = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._ingest_page, page): page for page in missing}
+            for future in as_completed(futures):
+                try:
+                    rows += future.result()
+                except Exception as error:
+                    failures.append((futures[future], error))
+
+        if failures:
+            page, error = failures[0]
+            raise RuntimeError(
+                f"{len(failures)} of {len(missing)} pages failed (first: page {page.index}); "
+                "run the ingestion again to resume"
+            ) from error
+        return {"fetched_pages": len(missing), "skipped_pages": len(self.pages) - len(missing), "rows": rows}
+
+    def is_complete(self) -> bool:
+        return all(has_columns(self._shard_path(page)) for page in self.pages)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Concatenate the shards, in page (source_id range) order."""
+        if not self.is_complete():
+            raise RuntimeError(f"Ingestion in {self.directory} is incomplete, call run() first")
+        shards = [load_columns(self._shard_path(page), mmap=False) for page in self.pages]
+        return pd.concat([shard for shard in shards if len(shard)] or shards[:1], ignore_index=True)
+
+    def _ingest_page(self, page: Page) -> int:
+        df = self.backend.fetch_page(page, self.magnitude_limit)
+        # astroquery returns SOURCE_ID in upper case, keep that for every backend
+        df = df.rename(columns={"source_id": "SOURCE_ID"})
+        save_columns(df, self._shard_path(page))
+        return len(df)
+
+    def _shard_path(self, page: Page) -> pathlib.Path:
+        return self.directory / "shards" / f"page-{page.index:08d}.columns"
+
+    def _check_settings(self):
+        settings = {"magnitude_limit": self.magnitude_limit, "healpix_level": self.healpix_level}
+        path = self.directory / self.SETTINGS_FILE
+        if path.exists():
+            existing = json.loads(path.read_text())
+            if existing != settings:
+                raise ValueError(
+                    f"{self.directory} holds an ingestion with {existing}, cannot resume it with {settings}"
+                )
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(settings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="where shards are written; rerun with the same one to resume")
+    parser.add_argument("--magnitude-limit", type=float, default=15)
+    parser.add_argument("--healpix-level", type=int, default=3, help="12 * 4**level pages")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    ingestion = GaiaIngestion(
+        args.directory,
+        magnitude_limit=args.magnitude_limit,
+        healpix_level=args.healpix_level,
+        workers=args.workers,
+    )
+    print(ingestion.run())
+
+
+if __name__ == "__main__":
+    main()
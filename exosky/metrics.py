@@ -0,0 +1,140 @@
+"""
+In-process timing spans and counters for the hot paths.
+
+    from exosky.metrics import metrics
+
+    with metrics.span("projection"):
+        ...
+    print(metrics.to_prometheus())
+
+Instrumentation is off unless the `EXOSKY_METRICS` environment variable is set (or
+`metrics.enabled` is set to True); disabled spans are a shared no-op context manager.
+Span durations are aggregated into fixed-bucket histograms, exported in the Prometheus text format.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_DISABLED_SPAN = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile (the largest value for the last bucket)."""
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """Registry of span histograms and counters; thread-safe, a no-op while not `enabled`."""
+
+    def __init__(self, enabled: bool = False, prefix: str = "exosky"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """Context manager timing its block into the `name` histogram."""
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: int = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def summary(self) -> list[dict]:
+        """One row per span: count, total, mean, approximate p95 and max, in milliseconds."""
+        with self._lock:
+            return [
+                {
+                    "span": name,
+                    "count": histogram.count,
+                    "total_ms": histogram.sum * 1000,
+                    "mean_ms": histogram.sum / histogram.count * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "max_ms": histogram.max * 1000,
+                }
+                for name, histogram in sorted(self._histograms.items())
+            ]
+
+    def to_prometheus(self, counters=()) -> str:
+        """
+        Prometheus text exposition of the span histograms and counters. `counters` adds
+        `(name, labels, value)` samples collected elsewhere, e.g. cache statistics.
+        """
+        span_metric = f"{self.prefix}_span_seconds"
+        lines = [f"# TYPE {span_metric} histogram"]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{span_metric}_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{span_metric}_sum{{span="{name}"}} {histogram.sum!r}')
+                lines.append(f'{span_metric}_count{{span="{name}"}} {histogram.count}')
+            samples = [(name, dict(labels), value) for (name, labels), value in sorted(self._counters.items())]
+
+        samples += list(counters)
+        declared = set()
+        for name, labels, value in sorted(samples, key=lambda sample: sample[0]):
+            metric = f"{self.prefix}_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(enabled=os.environ.get("EXOSKY_METRICS", "") not in ("", "0"))
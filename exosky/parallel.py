@@ -0,0 +1,205 @@
+"""
+Multi-process projection of a star catalog.
+
+The catalog geometry of a `ProjectionEngine` is copied once into `multiprocessing.shared_memory`
+blocks that every worker process attaches to at startup, so no catalog data is pickled per task.
+Results are written by the workers straight into shared output blocks as well.
+"""
+
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from exosky.projection import Projection, ProjectionEngine
+
+# engine rebuilt from the shared catalog blocks in every worker process, and the blocks it maps
+_worker_engine = None
+_worker_blocks = ()
+
+
+def _attach(name: str, shape, dtype) -> tuple[SharedMemory, np.ndarray]:
+    block = SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _share(array: np.ndarray) -> tuple[SharedMemory, np.ndarray]:
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, shared
+
+
+def _init_worker(xyz_spec, absolute_magnitude_spec):
+    global _worker_engine, _worker_blocks
+    xyz_block, xyz = _attach(*xyz_spec)
+    magnitude_block, absolute_magnitude = _attach(*absolute_magnitude_spec)
+    _worker_engine = ProjectionEngine.from_arrays(xyz, absolute_magnitude)
+    _worker_blocks = (xyz_block, magnitude_block)
+
+
+def _project_stars(viewpoint, start: int, stop: int, out_spec):
+    """Project stars `start:stop` for one viewpoint into rows (ra, dec, distance, magnitude) of the output block."""
+    block, out = _attach(*out_spec)
+    try:
+        out[:, start:stop] = _worker_engine.project(viewpoint, slice(start, stop))
+    finally:
+        del out
+        block.close()
+
+
+def _project_viewpoints(viewpoints, start: int, chunk_size: int, out_spec):
+    """Project viewpoints into rows `start:start + len(viewpoints)` of an (k, 3, n) output block."""
+    block, out = _attach(*out_spec)
+    try:
+        projections = _worker_engine.project_many(viewpoints, chunk_size=chunk_size, dtype=out.dtype)
+        for i, projection in enumerate(projections):
+            out[start + i] = projection
+    finally:
+        del out
+        block.close()
+
+
+class ParallelProjectionEngine:
+    """
+    `ProjectionEngine` whose projections run on a pool of `workers` processes.
+
+    A single viewpoint is split into star chunks (catalogs smaller than `min_stars_per_worker`
+    per worker are projected in-process, where the pool overhead would dominate) and
+    `project_many` is split by viewpoint. Subset projections (`indices`) stay in-process.
+    If the pool cannot be started or breaks, the engine falls back to in-process execution.
+
+    The shared blocks are released by `close`, or when the engine is garbage collected.
+    """
+
+    def __init__(self, engine: ProjectionEngine, workers: int, min_stars_per_worker: int = 100_000):
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        self.engine = engine
+        self.workers = workers
+        self.min_stars_per_worker = min_stars_per_worker
+        self._blocks = []
+        self._executor = None
+        if workers > 1:
+            try:
+                self._start()
+            except (OSError, NotImplementedError, ImportError) as error:
+                print(f"Multi-process projection unavailable, projecting in-process: {error!r}")
+                self.close()
+        self._finalizer = weakref.finalize(self, self._release, self._executor, self._blocks)
+
+    @property
+    def xyz(self) -> np.ndarray:
+        return self.engine.xyz
+
+    @property
+    def absolute_magnitude(self) -> np.ndarray:
+        return self.engine.absolute_magnitude
+
+    @property
+    def parallel(self) -> bool:
+        return self._executor is not None
+
+    def __len__(self):
+        return len(self.engine)
+
+    def project(self, viewpoint, indices=None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Same as `ProjectionEngine.project`, split into one star chunk per worker."""
+        n = len(self)
+        if indices is not None or not self.parallel or n < self.workers * self.min_stars_per_worker:
+            return self.engine.project(viewpoint, indices)
+
+        viewpoint = np.asarray(viewpoint, dtype=np.float64).reshape(3)
+        bounds = np.linspace(0, n, self.workers + 1).astype(int)
+        out = self._run(
+            _project_stars,
+            (4, n),
+            np.float64,
+            [(viewpoint, start, stop) for start, stop in zip(bounds[:-1], bounds[1:])],
+        )
+        if out is None:
+            return self.engine.project(viewpoint)
+        ra, dec, distance, apparent_magnitude = out
+        return ra, dec, distance, apparent_magnitude
+
+    def project_many(self, viewpoints, chunk_size: int = 16, dtype=np.float32):
+        """
+        Same as `ProjectionEngine.project_many`, with the viewpoints split between the workers.
+
+        Viewpoints are dispatched `workers * chunk_size` at a time, which bounds the shared output.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        viewpoints = np.asarray(viewpoints, dtype=np.float64).reshape(-1, 3)
+        if not self.parallel or len(viewpoints) < 2:
+            yield from self.engine.project_many(viewpoints, chunk_size, dtype)
+            return
+
+        batch_size = self.workers * chunk_size
+        for batch_start in range(0, len(viewpoints), batch_size):
+            batch = viewpoints[batch_start : batch_start + batch_size]
+            step = -(-len(batch) // self.workers)
+            out = self._run(
+                _project_viewpoints,
+                (len(batch), 3, len(self)),
+                np.dtype(dtype),
+                [(batch[start : start + step], start, chunk_size) for start in range(0, len(batch), step)],
+            )
+            if out is None:
+                yield from self.engine.project_many(batch, chunk_size, dtype)
+            else:
+                for ra, dec, apparent_magnitude in out:
+                    yield Projection(ra, dec, apparent_magnitude)
+
+    def project_stream(self, viewpoints, dtype=np.float32):
+        """Same as `ProjectionEngine.project_stream`, in-process: a stream is one viewpoint at a time."""
+        return self.engine.project_stream(viewpoints, dtype)
+
+    def close(self):
+        """Shut the pool down and release the shared catalog; later projections run in-process."""
+        executor, self._executor = self._executor, None
+        self._release(executor, self._blocks)
+
+    def _start(self):
+        for array in (self.engine.xyz, self.engine.absolute_magnitude):
+            self._blocks.append(_share(array)[0])
+        specs = [
+            (block.name, array.shape, array.dtype)
+            for block, array in zip(self._blocks, (self.engine.xyz, self.engine.absolute_magnitude))
+        ]
+        # spawned workers do not inherit the threads (and locks) of the parent, unlike forked ones
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=tuple(specs),
+        )
+
+    def _run(self, function, shape, dtype, tasks):
+        """Run `function(*task, out_spec)` for every task on the pool; returns a copy of the output or None."""
+        block = SharedMemory(create=True, size=max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1))
+        try:
+            spec = (block.name, shape, dtype)
+            futures = [self._executor.submit(function, *task, spec) for task in tasks]
+            for future in futures:
+                future.result()
+            return np.ndarray(shape, dtype=dtype, buffer=block.buf).copy()
+        except BrokenProcessPool as error:
+            print(f"Projection worker died, projecting in-process from now on: {error!r}")
+            self.close()
+            return None
+        finally:
+            block.close()
+            block.unlink()
+
+    @staticmethod
+    def _release(executor, blocks):
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        while blocks:
+            block = blocks.pop()
+            block.close()
+            block.unlink()
@@ -0,0 +1,101 @@
+import queue
+import threading
+
+
+class Prefetcher:
+    """
+    Runs speculative work on `workers` daemon threads from a queue bounded to `max_queued` tasks.
+
+    `submit` replaces the current batch: tasks of the previous batch still waiting in the queue are
+    dropped, and workers skip any they pick up afterwards, so stale work stops at the next task boundary
+    (a task that is already running finishes). Tasks that do not fit in the queue are not queued.
+    Results are not returned, tasks are expected to fill a cache; failures are counted and ignored.
+    """
+
+    def __init__(self, workers: int = 2, max_queued: int = 64):
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, tasks) -> int:
+        """Cancel the pending batch and queue the callables in `tasks`, in order; returns how many were queued."""
+        with self._lock:
+            generation = self._cancel_pending()
+            self._start()
+            queued = 0
+            for task in tasks:
+                try:
+                    self._queue.put_nowait((generation, task))
+                except queue.Full:
+                    self.dropped += 1
+                    continue
+                queued += 1
+            self.submitted += queued
+        return queued
+
+    def cancel(self) -> None:
+        """Drop every pending task."""
+        with self._lock:
+            self._cancel_pending()
+
+    def join(self) -> None:
+        """Block until every queued task has run or been skipped."""
+        self._queue.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "pending": self._queue.qsize(),
+            }
+
+    def _cancel_pending(self) -> int:
+        """Start a new generation and empty the queue; returns the new generation."""
+        self._generation += 1
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return self._generation
+            self._queue.task_done()
+            self.cancelled += 1
+
+    def _start(self):
+        # threads are started on the first batch, so an unused prefetcher costs nothing
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"exosky-prefetch-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            generation, task = self._queue.get()
+            try:
+                if generation != self._generation:
+                    with self._lock:
+                        self.cancelled += 1
+                    continue
+                try:
+                    task()
+                except Exception as error:
+                    print(f"Prefetch task failed: {error!r}")
+                    with self._lock:
+                        self.failed += 1
+                else:
+                    with self._lock:
+                        self.completed += 1
+            finally:
+                self._queue.task_done()
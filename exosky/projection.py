@@ -0,0 +1,181 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Projection(NamedTuple):
+    """Sky of a single viewpoint: per-star ra, dec (degrees) and apparent magnitude."""
+
+    ra: np.ndarray
+    dec: np.ndarray
+    apparent_magnitude: np.ndarray
+
+    def freeze(self) -> "Projection":
+        """Mark the arrays read-only, so the projection can be shared between callers and threads."""
+        for array in self:
+            array.setflags(write=False)
+        return self
+
+    def astype(self, dtype) -> "Projection":
+        return Projection(*(array.astype(dtype, copy=False) for array in self))
+
+
+def spherical_to_cartesian(ra, dec, distance) -> np.ndarray:
+    """Convert ICRS ra/dec in degrees and distance in parsecs to an (n, 3) array."""
+    ra_rad = np.radians(np.asarray(ra, dtype=np.float64))
+    dec_rad = np.radians(np.asarray(dec, dtype=np.float64))
+    distance = np.asarray(distance, dtype=np.float64)
+    cos_dec = np.cos(dec_rad)
+    return np.stack(
+        (
+            distance * cos_dec * np.cos(ra_rad),
+            distance * cos_dec * np.sin(ra_rad),
+            distance * np.sin(dec_rad),
+        ),
+        axis=-1,
+    )
+
+
+def cartesian_to_spherical(x, y, z) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Inverse of `spherical_to_cartesian`: returns ra in [0, 360), dec and distance."""
+    # plain sqrt and a masked add are several times faster than np.hypot and % 360
+    rho_squared = x * x + y * y
+    ra = np.degrees(np.arctan2(y, x))
+    ra += 360 * (ra < 0)
+    dec = np.degrees(np.arctan2(z, np.sqrt(rho_squared)))
+    distance = np.sqrt(rho_squared + z * z)
+    return ra, dec, distance
+
+
+def flight_path(start, end, frames: int) -> np.ndarray:
+    """
+    `frames` positions, as an (frames, 3) array, from `start` to `end` (Cartesian, in parsecs),
+    accelerating away from `start` and slowing down towards `end` (smoothstep easing).
+    """
+    start = np.asarray(start, dtype=np.float64).reshape(3)
+    end = np.asarray(end, dtype=np.float64).reshape(3)
+    t = np.linspace(0, 1, frames)[:, np.newaxis]
+    t = t * t * (3 - 2 * t)
+    return start + t * (end - start)
+
+
+class ProjectionEngine:
+    """
+    Star catalog geometry precomputed once, so that the sky from any viewpoint
+    is a handful of vectorized NumPy operations instead of an astropy transform.
+
+    Distances follow `Distance(parallax=..., allow_negative=True)`: 1000 / parallax pc,
+    with negative parallaxes turned into NaN distances, exactly as in the astropy path.
+
+    `xyz` is stored component-major, with shape (3, n), so each axis is contiguous.
+    """
+
+    def __init__(self, ra, dec, parallax, phot_g_mean_mag):
+        parallax = np.asarray(parallax, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance = np.where(parallax < 0, np.nan, 1000 / parallax)
+            self.absolute_magnitude = np.asarray(phot_g_mean_mag, dtype=np.float64) + 5 - 5 * np.log10(distance)
+        self.xyz = np.ascontiguousarray(spherical_to_cartesian(ra, dec, distance).T)
+
+    @classmethod
+    def from_arrays(cls, xyz, absolute_magnitude) -> "ProjectionEngine":
+        """Wrap already computed geometry, e.g. arrays in shared memory, without copying it."""
+        engine = cls.__new__(cls)
+        engine.xyz = xyz
+        engine.absolute_magnitude = absolute_magnitude
+        return engine
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Build the engine from a DataFrame or a `StarCatalog`."""
+        return cls(
+            np.asarray(df["ra"]),
+            np.asarray(df["dec"]),
+            np.asarray(df["parallax"]),
+            np.asarray(df["phot_g_mean_mag"]),
+        )
+
+    def __len__(self):
+        return self.xyz.shape[1]
+
+    def project(self, viewpoint, indices=None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Project the catalog onto the sky of an observer at `viewpoint`,
+        a Cartesian (x, y, z) position in parsecs, optionally only the stars at `indices`.
+
+        Returns new ra, dec (degrees), distance (pc) and apparent magnitude.
+        """
+        xyz = self.xyz if indices is None else self.xyz[:, indices]
+        absolute_magnitude = self.absolute_magnitude if indices is None else self.absolute_magnitude[indices]
+        relative = xyz - np.asarray(viewpoint, dtype=np.float64).reshape(3, 1)
+        ra, dec, distance = cartesian_to_spherical(*relative)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            apparent_magnitude = absolute_magnitude - 5 + 5 * np.log10(distance)
+        return ra, dec, distance, apparent_magnitude
+
+    def project_many(self, viewpoints, chunk_size: int = 16, dtype=np.float32):
+        """
+        Project the catalog for many viewpoints, given as an (k, 3) array in parsecs.
+
+        Viewpoints are processed `chunk_size` at a time in one broadcasted computation,
+        which bounds peak memory to roughly `chunk_size * len(self) * 3` float64 values.
+        Yields a compact `Projection` (arrays of `dtype`) per viewpoint, in input order.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        viewpoints = np.asarray(viewpoints, dtype=np.float64).reshape(-1, 3)
+        for start in range(0, len(viewpoints), chunk_size):
+            chunk = viewpoints[start : start + chunk_size]
+            relative = self.xyz[:, np.newaxis, :] - chunk.T[:, :, np.newaxis]
+            ra, dec, distance = cartesian_to_spherical(*relative)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                apparent_magnitude = self.absolute_magnitude - 5 + 5 * np.log10(distance)
+            for i in range(len(chunk)):
+                yield Projection(
+                    ra[i].astype(dtype),
+                    dec[i].astype(dtype),
+                    apparent_magnitude[i].astype(dtype),
+                )
+
+    def project_stream(self, viewpoints, dtype=np.float32):
+        """
+        Project the catalog for a stream of viewpoints (any iterable of (x, y, z) positions in parsecs),
+        e.g. the frames of an animation, one viewpoint at a time.
+
+        Every step writes into the same preallocated `dtype` buffers, so nothing is allocated per
+        viewpoint: the yielded `Projection` is only valid until the next one is requested, copy its
+        arrays to keep them. Positions are subtracted in float64 before the conversion to `dtype`,
+        so stars close to a viewpoint keep their direction.
+        """
+        n = len(self)
+        relative = np.empty((3, n), dtype=dtype)
+        rho_squared, scratch = np.empty(n, dtype=dtype), np.empty(n, dtype=dtype)
+        negative = np.empty(n, dtype=bool)
+        projection = Projection(np.empty(n, dtype=dtype), np.empty(n, dtype=dtype), np.empty(n, dtype=dtype))
+        ra, dec, apparent_magnitude = projection
+        # apparent magnitude = M - 5 + 5 log10(d) = (M - 5) + 2.5 log10(d²)
+        magnitude_offset = (self.absolute_magnitude - 5).astype(dtype)
+        x, y, z = relative
+
+        for viewpoint in viewpoints:
+            viewpoint = np.asarray(viewpoint, dtype=np.float64).reshape(3, 1)
+            np.subtract(self.xyz, viewpoint, out=relative, casting="same_kind")
+            np.multiply(x, x, out=rho_squared)
+            np.multiply(y, y, out=scratch)
+            rho_squared += scratch
+
+            np.arctan2(y, x, out=ra)
+            np.degrees(ra, out=ra)
+            np.less(ra, 0, out=negative)
+            np.add(ra, 360, out=ra, where=negative)
+            np.sqrt(rho_squared, out=scratch)
+            np.arctan2(z, scratch, out=dec)
+            np.degrees(dec, out=dec)
+
+            np.multiply(z, z, out=scratch)
+            scratch += rho_squared
+            with np.errstate(divide="ignore", invalid="ignore"):
+                np.log10(scratch, out=apparent_magnitude)
+            apparent_magnitude *= 2.5
+            apparent_magnitude += magnitude_offset
+            yield projection
@@ -1,62 +1,185 @@
+import hashlib
 import pathlib
+from typing import Optional
 
 import pandas as pd
-from astroquery.gaia import Gaia
-from astroquery.nasa_exoplanet_archive import NasaExoplanetArchive
-from astroquery.simbad import Simbad
 
+from exosky.catalog import StarCatalog
+from exosky.columnar import has_columns, load_columns
+from exosky.datacache import DataCache
+from exosky.metrics import metrics
 
-class DataLoader:
-
-    def load_exoplanet_archive(self) -> pd.DataFrame:
-        cache_path = pathlib.Path("tmp/exoplanet_archive_cache")
-        if not cache_path.exists():
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # https://exoplanetarchive.ipac.caltech.edu/docs/API_PS_columns.html
-            exoplanets = NasaExoplanetArchive.query_criteria(
-                table="PSCompPars",  # The new Planetary Systems (PS) table
-                select="pl_name, sy_dist, ra, dec, pl_orbsmax, st_mass, st_rad",
-                where="sy_dist IS NOT NULL",
-                cache=True,
-            )
-            df_exoplanets = exoplanets.to_pandas()
-            df_exoplanets.to_pickle(cache_path)
-        else:
-            df_exoplanets = pd.read_pickle(cache_path)
-
-        return df_exoplanets
 
-    def load_gaia_stars(self, number: int = 100000) -> pd.DataFrame:
+class DataLoader:
+    """
+    Loads the exoplanet archive and Gaia catalogs, caching them under `cache_dir`.
+
+    Caches are stored as per-column `.npy` directories (see `exosky.columnar`) and opened
+    memory mapped, so cold starts are fast and worker processes share the page cache.
+    Each cache entry is keyed by a hash of its query parameters (see `exosky.datacache.DataCache`),
+    so changing e.g. `number` fetches a new catalog. Concurrent cold starts fetch only once,
+    entries older than `max_age` seconds are refreshed, and `refresh=True` forces a new fetch.
+    Caches written by older versions (pickles and unkeyed directories) are still read and
+    converted on first use, for the default parameters they were written with.
+    Gaia columns are cached in the compact dtypes of `StarCatalog`, which then wraps the memory maps
+    without copying them; caches written with float64 columns are converted in place on first load.
+    astroquery (and astropy's network stack with it) is only imported on a cache miss.
+
+    With a `gaia_ingestion` (see `exosky.ingest.GaiaIngestion`) the Gaia catalog is downloaded
+    page by page, resumably, instead of with a single `SELECT TOP number` query.
+    """
+
+    EXOPLANET_ARCHIVE_TABLE = "PSCompPars"  # The new Planetary Systems (PS) table
+    EXOPLANET_ARCHIVE_COLUMNS = "pl_name, sy_dist, ra, dec, pl_orbsmax, st_mass, st_rad"
+    EXOPLANET_ARCHIVE_WHERE = "sy_dist IS NOT NULL"
+    GAIA_TABLE = "gaiadr3.gaia_source"
+    GAIA_COLUMNS = "source_id, ra, dec, parallax, phot_g_mean_mag, bp_rp"
+    GAIA_MAGNITUDE_LIMIT = 15
+    DEFAULT_GAIA_STARS = 100000
+
+    def __init__(
+        self,
+        cache_dir: str | pathlib.Path = "tmp",
+        mmap: bool = True,
+        gaia_ingestion=None,
+        max_age: Optional[float] = None,
+    ):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.mmap = mmap
+        self.gaia_ingestion = gaia_ingestion
+        self.cache = DataCache(self.cache_dir, mmap=mmap, max_age=max_age)
+        self._loaded = {}
+
+    def load_exoplanet_archive(self, refresh: bool = False) -> pd.DataFrame:
+        return self._load_cached(
+            "exoplanet_archive_cache", self._exoplanet_archive_params(), self._query_exoplanet_archive, refresh
+        )
+
+    def load_gaia_stars(self, number: int = DEFAULT_GAIA_STARS, refresh: bool = False) -> pd.DataFrame:
+        params = self._gaia_stars_params(number)
+        df = self._load_cached(
+            "gaia_cache", params, lambda: self._query_gaia_stars(number), refresh, convert=StarCatalog.compact
+        )
+        if not StarCatalog.is_compact(df):
+            # written in float64 or with string names by an older version, which the StarCatalog would copy out
+            # of the memory maps or never use
+            df = self.cache.rewrite("gaia_cache", params, self._compact_stars)
+        return df
 
-        cache_path = pathlib.Path("tmp/gaia_cache")
-        if not cache_path.exists():
+    @staticmethod
+    def _compact_stars(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        # None when another process converted the entry first
+        return None if StarCatalog.is_compact(df) else StarCatalog.compact(df)
+
+    def catalog_version(self) -> str:
+        """
+        Short id of the catalogs last loaded (the default ones before any load); it changes whenever
+        one of them is fetched again, so downstream caches can key on it.
+        """
+        loaded = {
+            "exoplanet_archive_cache": self._exoplanet_archive_params(),
+            "gaia_cache": self._gaia_stars_params(self.DEFAULT_GAIA_STARS),
+        }
+        loaded.update(self._loaded)
+        digest = hashlib.sha1()
+        for name, params in sorted(loaded.items()):
+            digest.update(f"{name}:{self.cache.version(name, params)};".encode())
+        return digest.hexdigest()[:12]
+
+    def _exoplanet_archive_params(self) -> dict:
+        return {
+            "table": self.EXOPLANET_ARCHIVE_TABLE,
+            "select": self.EXOPLANET_ARCHIVE_COLUMNS,
+            "where": self.EXOPLANET_ARCHIVE_WHERE,
+        }
+
+    def _gaia_stars_params(self, number: int) -> dict:
+        if self.gaia_ingestion is not None:
+            ingestion = self.gaia_ingestion
+            return {
+                "ingestion": str(ingestion.directory.resolve()),
+                "magnitude_limit": ingestion.magnitude_limit,
+                "healpix_level": ingestion.healpix_level,
+            }
+        return {
+            "table": self.GAIA_TABLE,
+            "select": self.GAIA_COLUMNS,
+            "magnitude_limit": self.GAIA_MAGNITUDE_LIMIT,
+            "number": number,
+        }
+
+    def _load_cached(self, name: str, params: dict, query, refresh: bool = False, convert=None) -> pd.DataFrame:
+        """The cached `query` result, fetched (and passed through `convert` before it is stored) on a miss."""
+
+        def fetch():
+            metrics.increment("loader_cache_misses_total", cache=name)
+            df = None if refresh else self._read_legacy_cache(name, params)
+            if df is None:
+                with metrics.span(f"fetch.{name}"):
+                    df = query()
+            return df if convert is None else convert(df)
+
+        with metrics.span(f"load.{name}"):
+            df = self.cache.load(name, params, fetch, refresh=refresh)
+        self._loaded[name] = params
+        return df
 
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
+    def _read_legacy_cache(self, name: str, params: dict) -> Optional[pd.DataFrame]:
+        # older caches were written for the default queries only, under fixed names
+        defaults = {
+            "exoplanet_archive_cache": self._exoplanet_archive_params(),
+            "gaia_cache": self._gaia_stars_params(self.DEFAULT_GAIA_STARS),
+        }
+        if params != defaults.get(name):
+            return None
+        columns_path = self.cache_dir / f"{name}.columns"
+        if has_columns(columns_path):
+            return load_columns(columns_path, mmap=False)
+        pickle_path = self.cache_dir / name
+        if pickle_path.exists():
+            return pd.read_pickle(pickle_path)
+        return None
+
+    def _query_exoplanet_archive(self) -> pd.DataFrame:
+        from astroquery.nasa_exoplanet_archive import NasaExoplanetArchive
+
+        # https://exoplanetarchive.ipac.caltech.edu/docs/API_PS_columns.html
+        exoplanets = NasaExoplanetArchive.query_criteria(
+            table=self.EXOPLANET_ARCHIVE_TABLE,
+            select=self.EXOPLANET_ARCHIVE_COLUMNS,
+            where=self.EXOPLANET_ARCHIVE_WHERE,
+            cache=True,
+        )
+        return exoplanets.to_pandas()
+
+    def _query_gaia_stars(self, number: int) -> pd.DataFrame:
+        if self.gaia_ingestion is not None:
+            self.gaia_ingestion.run()
+            df = self.gaia_ingestion.to_dataframe()
+        else:
+            from astroquery.gaia import Gaia
 
             job = Gaia.launch_job(
                 f"""SELECT TOP {number}
-                source_id, ra, dec, parallax, phot_g_mean_mag, bp_rp
-                FROM gaiadr3.gaia_source
-                WHERE phot_g_mean_mag < 15
+                {self.GAIA_COLUMNS}
+                FROM {self.GAIA_TABLE}
+                WHERE phot_g_mean_mag < {self.GAIA_MAGNITUDE_LIMIT}
                 """
             )
             result = job.get_results()
             df = result.to_pandas()
 
-            # Add a 'name' column with default values as source_id
-            df["name"] = df["SOURCE_ID"].astype(str)
+        # Star names default to the source_id; they are formatted on demand by `StarCatalog.names`
+        # rather than stored as one Python string per row
 
-            # Attempt to match with SIMBAD names
-            # df["name"] = df["SOURCE_ID"].apply(lambda x: self.match_star_name(str(x)))
-
-            df.to_pickle(cache_path)
-        else:
-            df = pd.read_pickle(cache_path)
+        # Attempt to match with SIMBAD names
+        # df["name"] = df["SOURCE_ID"].apply(lambda x: self.match_star_name(str(x)))
 
         return df
 
     # def match_star_name(self, gaia_source_id: str) -> str:
+    #     from astroquery.simbad import Simbad
+    #
     #     try:
     #         simbad_query = Simbad.query_object(f"Gaia DR3 {gaia_source_id}")
     #         if simbad_query is not None and "MAIN_ID" in simbad_query.colnames:
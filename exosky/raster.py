@@ -0,0 +1,302 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from exosky.vizualizer import MollweideVizualizer
+
+BACKGROUND = np.array([0x00, 0x00, 0x33]) / 255  # same as the matplotlib axes facecolor
+OUTSIDE = np.array([1.0, 1.0, 1.0])  # figure background around the Mollweide ellipse
+GRID_COLOR = np.array([0xB0, 0xB0, 0xB0]) / 255  # matplotlib's default grid color
+WHITE = np.array([1.0, 1.0, 1.0])
+RED = np.array([1.0, 0.0, 0.0])
+
+RA_TICKS = np.radians(np.arange(-180, 181, 30))
+DEC_TICKS = np.radians(np.arange(-80, 81, 20))
+
+
+class SkyImage:
+    """An RGB pixel buffer rendered by `RasterVizualizer`, encoded to PNG on demand."""
+
+    def __init__(self, rgb: np.ndarray):
+        self.rgb = rgb
+        self._png = None
+
+    @property
+    def png(self) -> bytes:
+        if self._png is None:
+            buffer = io.BytesIO()
+            # low compression: the sky is mostly flat background, and encoding time dominates otherwise
+            Image.fromarray(self.rgb, mode="RGB").save(buffer, format="PNG", compress_level=1)
+            self._png = buffer.getvalue()
+        return self._png
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.png)
+
+
+def mollweide_xy(lon, lat) -> tuple[np.ndarray, np.ndarray]:
+    """Mollweide coordinates (x in [-2√2, 2√2], y in [-√2, √2]) of longitude/latitude in radians."""
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    # Newton iterations for 2θ + sin 2θ = π sin φ, solved for t = 2θ
+    target = np.pi * np.sin(lat)
+    t = 2 * lat
+    for _ in range(20):
+        derivative = 1 + np.cos(t)
+        step = np.divide(t + np.sin(t) - target, derivative, out=np.zeros_like(t), where=derivative > 1e-12)
+        t -= step
+        if np.all(np.abs(step) < 1e-9):
+            break
+    theta = np.where(np.abs(lat) >= np.pi / 2 - 1e-9, np.sign(lat) * np.pi / 2, t / 2)
+    return 2 * np.sqrt(2) / np.pi * lon * np.cos(theta), np.sqrt(2) * np.sin(theta)
+
+
+def _disk_offsets(radius: int) -> tuple[np.ndarray, np.ndarray]:
+    dy, dx = np.mgrid[-radius : radius + 1, -radius : radius + 1]
+    inside = dx**2 + dy**2 <= radius**2 + radius
+    return dx[inside], dy[inside]
+
+
+def _disk_mask(radius: int) -> np.ndarray:
+    dy, dx = np.ogrid[-radius : radius + 1, -radius : radius + 1]
+    return dx**2 + dy**2 <= radius**2 + radius
+
+
+def splat(canvas: np.ndarray, x, y, radius, rgba: np.ndarray, alpha: float = 1.0) -> None:
+    """
+    Alpha-blend discs of `radius` pixels centred on (`x`, `y`) into a float (h, w, 3) canvas.
+
+    Stars are grouped by integer radius. Small discs, which most stars are, are drawn one stencil
+    offset at a time for all stars of the group at once; large discs, which are few, are blitted
+    star by star, so the number of Python-level steps stays small either way. Discs smaller than
+    a pixel are drawn as one pixel whose opacity is scaled by the covered area, like antialiasing.
+    """
+    height, width = canvas.shape[:2]
+    radius = np.asarray(radius, dtype=np.float64)
+    opacity = alpha * rgba[:, 3] * np.clip(np.pi * radius**2, 0, 1)
+    stencil_radius = np.maximum(np.ceil(radius - 0.5), 0).astype(np.int64)
+    column = np.floor(x).astype(np.int64)
+    row = np.floor(y).astype(np.int64)
+
+    for r in np.unique(stencil_radius):
+        r = int(r)
+        selected = np.flatnonzero((stencil_radius == r) & (opacity > 0))
+        offsets = _disk_offsets(r)
+        if len(selected) >= len(offsets[0]):
+            pixels = canvas.reshape(-1, 3)
+            a = opacity[selected, np.newaxis].astype(canvas.dtype)
+            premultiplied = rgba[selected, :3] * a
+            transparency = 1 - a
+            px, py = column[selected], row[selected]
+            for dx, dy in zip(*offsets):
+                inside = (px >= -dx) & (px < width - dx) & (py >= -dy) & (py < height - dy)
+                index = (py[inside] + dy) * width + px[inside] + dx
+                pixels[index] = pixels[index] * transparency[inside] + premultiplied[inside]
+            continue
+
+        mask = _disk_mask(r)
+        for star in selected:
+            top, left = row[star] - r, column[star] - r
+            y0, x0 = max(top, 0), max(left, 0)
+            y1, x1 = min(top + 2 * r + 1, height), min(left + 2 * r + 1, width)
+            if y0 >= y1 or x0 >= x1:
+                continue
+            covered = mask[y0 - top : y1 - top, x0 - left : x1 - left]
+            region = canvas[y0:y1, x0:x1]
+            region[covered] = region[covered] * (1 - opacity[star]) + rgba[star, :3] * opacity[star]
+
+
+class RasterVizualizer(MollweideVizualizer):
+    """
+    Renders the sky straight into a NumPy pixel buffer instead of a matplotlib figure.
+
+    `plot` has the same signature as `MollweideVizualizer.plot` and keeps its star filtering,
+    `coolwarm` bp_rp colors, exponential size scaling and Earth inset, but returns a `SkyImage`
+    (and no axes). Marker areas are converted from points² to pixels at `dpi`, and the
+    canvas always spans the full sky. The constellation chart is inherited unchanged.
+    """
+
+    thread_safe = True  # every call draws into its own buffer
+
+    def __init__(self, magnitude_treshold: float = 10, width: int = 1600, height: int = 800, dpi: float = 100):
+        super().__init__(magnitude_treshold)
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self._background = None
+        self._grid_pixels = {}
+
+    def plot(
+        self,
+        ra_arr,
+        dec_arr,
+        mag_arr,
+        bp_rp_arr,
+        grid: bool = True,
+        mollweide: bool = False,
+        earth: tuple[float, float, float] | None = None,
+    ):
+        bright_starts = mag_arr < self.magnitude_treshold
+        ra_arr = ra_arr[bright_starts]
+        dec_arr = dec_arr[bright_starts]
+        mag_arr = mag_arr[bright_starts]
+        bp_rp_arr = bp_rp_arr[bright_starts]
+
+        ra_rad = np.radians(ra_arr - 180)
+        dec_rad = np.radians(dec_arr)
+        size = np.clip(np.exp(4 - mag_arr), 0, 100) * 2
+        colors = self.cmap(self.norm(bp_rp_arr))
+
+        canvas = self._blank_canvas()
+        x, y = self._to_pixels(ra_rad, dec_rad, mollweide)
+        splat(canvas, x, y, self._marker_radius(size), colors, alpha=0.75)
+
+        if grid:
+            self._draw_grid(canvas, mollweide)
+        if mollweide:
+            canvas[~self._mollweide_mask()] = OUTSIDE
+        elif earth:  # the inset is not supported in Mollweide projection
+            self._draw_earth(canvas, earth, ra_rad, dec_rad, size, colors)
+
+        # in place, and the image is opaque: storing RGBA would cost a strided copy of every pixel
+        np.clip(canvas, 0, 1, out=canvas)
+        canvas *= 255
+        np.rint(canvas, out=canvas)
+        return SkyImage(canvas.astype(np.uint8)), None
+
+    def encode(self, image: SkyImage) -> bytes:
+        return image.png
+
+    def rasterize(self, image: SkyImage) -> np.ndarray:
+        return image.rgb
+
+    def release(self, image: SkyImage) -> None:
+        """Nothing to release, images are plain arrays (same interface as `MollweideVizualizer`)."""
+
+    def close(self) -> None:
+        pass
+
+    def _blank_canvas(self) -> np.ndarray:
+        # copying a filled canvas is several times faster than broadcasting the color into a new one
+        if self._background is None or self._background.shape[:2] != (self.height, self.width):
+            background = np.empty((self.height, self.width, 3), dtype=np.float32)
+            background[:] = BACKGROUND
+            self._background = background
+        return self._background.copy()
+
+    def _marker_radius(self, size):
+        # scatter sizes are marker areas in points²
+        return np.sqrt(size) / 2 * self.dpi / 72
+
+    def _to_pixels(self, lon, lat, mollweide: bool):
+        if mollweide:
+            mx, my = mollweide_xy(lon, lat)
+            return (mx / (4 * np.sqrt(2)) + 0.5) * self.width, (0.5 - my / (2 * np.sqrt(2))) * self.height
+        return (np.asarray(lon) + np.pi) / (2 * np.pi) * self.width, (np.pi / 2 - np.asarray(lat)) / np.pi * self.height
+
+    def _mollweide_mask(self):
+        rows, columns = np.ogrid[: self.height, : self.width]
+        x = ((columns + 0.5) / self.width - 0.5) * 2
+        y = ((rows + 0.5) / self.height - 0.5) * 2
+        return x**2 + y**2 <= 1
+
+    def _draw_grid(self, canvas, mollweide: bool):
+        # the grid pixels only depend on the canvas size and projection, keep them for the next frames
+        key = (self.width, self.height, mollweide)
+        pixels = self._grid_pixels.get(key)
+        if pixels is None:
+            samples = np.linspace(-np.pi, np.pi, 4 * max(self.width, self.height))
+            lon = np.concatenate([np.full_like(samples, tick) for tick in RA_TICKS] + [samples for _ in DEC_TICKS])
+            lat = np.concatenate([samples / 2 for _ in RA_TICKS] + [np.full_like(samples, tick) for tick in DEC_TICKS])
+            x, y = self._to_pixels(lon, lat, mollweide)
+            px = np.clip(np.floor(x).astype(np.int64), 0, self.width - 1)
+            py = np.clip(np.floor(y).astype(np.int64), 0, self.height - 1)
+            pixels = self._grid_pixels[key] = np.unique(py * self.width + px)
+        canvas.reshape(-1, 3)[pixels] = GRID_COLOR
+
+    def _draw_earth(self, canvas, earth, ra_rad, dec_rad, size, colors):
+        # same placement as MollweideVizualizer._add_earth_subplot: bounds are fractions of the axes
+        inset_coord = [0, 0, 30, 30]
+        if earth[0] < 30:
+            inset_coord[0] = 30
+        if earth[1] < 30:
+            inset_coord[1] = 30
+        left, bottom, inset_width, inset_height = np.radians(inset_coord)
+        x0 = int(round(left * self.width))
+        x1 = int(round((left + inset_width) * self.width))
+        y0 = int(round((1 - bottom - inset_height) * self.height))
+        y1 = int(round((1 - bottom) * self.height))
+
+        earth_mag = 4.83 - 5 + 5 * np.log10(earth[2])  # 4.83 is a sun absolute magnitude
+        earth_rgba = np.array([[1.0, 1.0, 1.0, 1.0]])
+
+        # zoomed region: earth ± 5 degrees
+        xlim = np.radians((earth[0] - 5, earth[0] + 5))
+        ylim = np.radians((earth[1] - 5, earth[1] + 5))
+        inset = np.empty((y1 - y0, x1 - x0, 3), dtype=np.float32)
+        inset[:] = BACKGROUND
+
+        def to_inset(lon, lat):
+            return (
+                (np.asarray(lon) - xlim[0]) / (xlim[1] - xlim[0]) * inset.shape[1],
+                (ylim[1] - np.asarray(lat)) / (ylim[1] - ylim[0]) * inset.shape[0],
+            )
+
+        cx, cy = to_inset(np.radians(earth[0]), np.radians(earth[1]))
+        # a 0.25 degree circle in data coordinates, so an ellipse when the inset is not square
+        ring_x, ring_y = 0.25 / 10 * inset.shape[1], 0.25 / 10 * inset.shape[0]
+        rows, columns = np.ogrid[: inset.shape[0], : inset.shape[1]]
+        distance = np.hypot((columns + 0.5 - cx) / ring_x, (rows + 0.5 - cy) / ring_y)
+        inset[np.abs(distance - 1) * min(ring_x, ring_y) <= 1.5 * self.dpi / 72] = RED
+
+        splat(
+            inset,
+            np.atleast_1d(cx),
+            np.atleast_1d(cy),
+            self._marker_radius(np.clip(np.exp(4 - earth_mag) * 30, 0, 100)),
+            earth_rgba,
+            alpha=0.75,
+        )
+        visible = (ra_rad >= xlim[0] - 0.01) & (ra_rad <= xlim[1] + 0.01)
+        visible &= (dec_rad >= ylim[0] - 0.01) & (dec_rad <= ylim[1] + 0.01)
+        sx, sy = to_inset(ra_rad[visible], dec_rad[visible])
+        splat(inset, sx, sy, self._marker_radius(size[visible] * 30), colors[visible], alpha=0.75)
+
+        ex, ey = self._to_pixels(np.radians(earth[0]), np.radians(earth[1]), False)
+        splat(
+            canvas,
+            np.atleast_1d(ex),
+            np.atleast_1d(ey),
+            self._marker_radius(np.clip(np.exp(4 - earth_mag), 0, 100)),
+            earth_rgba,
+            alpha=0.75,
+        )
+
+        # the inset may stick out of the axes (as it does in matplotlib), keep the visible part
+        top, left = max(y0, 0), max(x0, 0)
+        bottom, right = min(y1, self.height), min(x1, self.width)
+        canvas[top:bottom, left:right] = inset[top - y0 : bottom - y0, left - x0 : right - x0]
+        line_width = max(int(round(2 * self.dpi / 72)), 1)
+        self._draw_rectangle(canvas, x0, y0, x1, y1, WHITE, line_width)
+        zx0, zy1 = self._to_pixels(xlim[0], ylim[0], False)
+        zx1, zy0 = self._to_pixels(xlim[1], ylim[1], False)
+        self._draw_rectangle(canvas, *(int(round(v)) for v in (zx0, zy0, zx1, zy1)), WHITE, line_width)
+
+    @staticmethod
+    def _draw_rectangle(canvas, x0, y0, x1, y1, color, line_width):
+        """Outline of the rectangle; edges outside of the canvas are skipped rather than clamped onto its border."""
+        height, width = canvas.shape[:2]
+        left, right = max(x0, 0), min(x1, width)
+        top, bottom = max(y0, 0), min(y1, height)
+        if left >= right or top >= bottom:
+            return
+        if y0 >= 0:
+            canvas[y0 : y0 + line_width, left:right] = color
+        if y1 <= height:
+            canvas[max(y1 - line_width, 0) : y1, left:right] = color
+        if x0 >= 0:
+            canvas[top:bottom, x0 : x0 + line_width] = color
+        if x1 <= width:
+            canvas[top:bottom, max(x1 - line_width, 0) : x1] = color
@@ -1,15 +1,18 @@
+import threading
+from contextlib import nullcontext
 from functools import cached_property
 from typing import Optional
 
-import astropy.units as u
 import numpy as np
 import pandas as pd
-from astropy.coordinates import (
-    CartesianRepresentation,
-    Distance,
-    SkyCoord,
-    SphericalRepresentation,
-)
+
+from exosky.cache import LRUCache, SpillCache
+from exosky.catalog import StarCatalog
+from exosky.index import NameIndex, NearestStarIndex, SkyTileIndex, VisibilityIndex
+from exosky.metrics import metrics
+from exosky.parallel import ParallelProjectionEngine
+from exosky.prefetch import Prefetcher
+from exosky.projection import Projection, ProjectionEngine, flight_path, spherical_to_cartesian
 
 
 class ExoplanetService:
@@ -23,11 +26,157 @@ class ExoplanetService:
     service.plot_exoplanet_projection("Earth")
     service.plot_exoplanet_projection("Kepler-138 c")
     service.get_exoplanets_within_distance(0, 100)
+
+    `projection_mode` selects how the sky is reprojected to an exoplanet viewpoint:
+    "numpy" (default) uses the precomputed Cartesian catalog of `ProjectionEngine`,
+    "astropy" keeps the original SkyCoord-based computation for comparison.
+    With `projection_workers` > 1 the NumPy engine runs on a pool of processes sharing the
+    catalog through shared memory (see `ParallelProjectionEngine`), and in-process otherwise.
+
+    The star catalog is held as a compact `StarCatalog`. Projections are immutable float32 arrays
+    kept in a thread-safe LRU cache keyed by exoplanet name, bounded by `projection_cache_bytes`
+    (see `projection_cache_stats`).
+
+    Encoded sky maps from `render_sky_map` are cached per view and catalog version, in memory
+    (`sky_map_cache_bytes`) with optional spill files in `sky_map_cache_dir`.
+
+    `prefetch` computes the projections (and optionally the sky maps) of the first exoplanets of a
+    listing on `prefetch_workers` background threads, so that opening one of them hits the caches.
+
+    Archive host stars are cross-matched to the Gaia catalog once per catalog load (see `get_host_star`),
+    so the sky of an exoplanet is drawn without its own host star; without a match, the stars within
+    `HOST_FALLBACK_DISTANCE` of the exoplanet are left out instead (see `host_star_indices`).
+
+    A long-lived service should be warmed with `preload` (or `preload_in_background` and
+    `wait_until_ready`) and refreshed with `reload` when the cached catalogs change.
     """
 
-    def __init__(self, data_loader, vizualizer):
+    PROJECTION_MODES = ("numpy", "astropy")
+    # star density of `get_viewport_stars` views with a pixel budget
+    VIEWPORT_PIXELS_PER_STAR = 50
+    # host star cross-match: largest separation (arcseconds), covering the proper motion between the
+    # archive and Gaia epochs for most hosts, and largest relative difference of sy_dist and 1 / parallax
+    HOST_MATCH_SEPARATION = 10
+    HOST_MATCH_DISTANCE_TOLERANCE = 0.2
+    # hosts without a match are taken to be the stars closer than this to the viewpoint: 0.05 pc (about
+    # 10000 au) is what HOST_MATCH_SEPARATION spans at 1 kpc, and far below the distance between stars
+    HOST_FALLBACK_DISTANCE = 0.05
+    # (grid, mollweide, display_earth) combinations offered by the app
+    SKY_MAP_VIEWS = (
+        (True, False, True),
+        (True, False, False),
+        (True, True, False),
+        (False, False, True),
+        (False, False, False),
+        (False, True, False),
+    )
+    # cached properties derived from the catalogs, dropped on `reload`
+    _CATALOG_PROPERTIES = (
+        "_explanet_df",
+        "_exoplanet_name_index",
+        "_exoplanets_by_distance",
+        "_exoplanet_distances",
+        "_star_catalog",
+        "_projection_engine",
+        "_visibility_index",
+        "_host_stars",
+        "_catalog_version",
+    )
+
+    def __init__(
+        self,
+        data_loader,
+        vizualizer,
+        projection_mode: str = "numpy",
+        projection_workers: int = 1,
+        projection_cache_bytes: int = 256 * 1024**2,
+        sky_map_cache_bytes: int = 64 * 1024**2,
+        sky_map_cache_dir=None,
+        sky_map_disk_bytes: int = 512 * 1024**2,
+        prefetch_workers: int = 2,
+        prefetch_queue_size: int = 64,
+    ):
+        if projection_mode not in self.PROJECTION_MODES:
+            raise ValueError(f"Unknown projection mode: {projection_mode}, expected one of {self.PROJECTION_MODES}")
         self.data_loader = data_loader
         self.vizualizer = vizualizer
+        self.projection_mode = projection_mode
+        self.projection_workers = projection_workers
+        self._projection_cache = LRUCache(projection_cache_bytes)
+        self._brightness_order_cache = LRUCache(projection_cache_bytes // 4)
+        self._sky_map_cache = SpillCache(sky_map_cache_bytes, sky_map_cache_dir, sky_map_disk_bytes)
+        self._prefetcher = Prefetcher(prefetch_workers, prefetch_queue_size)
+        # part of every cache key, so that results computed from the catalogs before a `reload` by
+        # tasks still running during it are never read again; keys derived from other cached results
+        # read it before fetching them
+        self._generation = 0
+        # matplotlib is not thread safe, vizualizers that are not `thread_safe` render one figure at a time
+        self._render_lock = threading.Lock()
+        self._load_lock = threading.RLock()
+        self.ready = threading.Event()
+        self._preload_error = None
+
+    def preload(self) -> None:
+        """Load the catalogs and the projection engine, then set `ready`."""
+        with self._load_lock:
+            self._preload_error = None
+            for name in self._CATALOG_PROPERTIES:
+                getattr(self, name)
+        self.ready.set()
+
+    def preload_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self._preload_background, name="exosky-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until preloading finishes; re-raises the error if background preloading failed."""
+        ready = self.ready.wait(timeout)
+        if self._preload_error is not None:
+            raise self._preload_error
+        return ready
+
+    def _preload_background(self):
+        try:
+            self.preload()
+        except Exception as error:
+            self._preload_failed(error)
+
+    def _preload_failed(self, error: Exception):
+        # waiters are released and get the error from `wait_until_ready` instead of blocking forever
+        self._preload_error = error
+        self.ready.set()
+
+    def reload(self) -> None:
+        """
+        Drop the loaded catalogs and every projection derived from them, and load them again; if that
+        fails, the error is raised here and by `wait_until_ready` until the next successful load.
+        """
+        with self._load_lock:
+            self.ready.clear()
+            self._generation += 1
+            self._prefetcher.cancel()
+            self.close()
+            for name in self._CATALOG_PROPERTIES:
+                self.__dict__.pop(name, None)
+            self._projection_cache.clear()
+            self._brightness_order_cache.clear()
+            self._sky_map_cache.clear()
+            try:
+                self.preload()
+            except Exception as error:
+                self._preload_failed(error)
+                raise
+
+    def close(self) -> None:
+        """
+        Stop the projection worker processes, if any, and drop the vizualizer's pooled figures;
+        the service stays usable in-process.
+        """
+        engine = self.__dict__.get("_projection_engine")
+        if isinstance(engine, ParallelProjectionEngine):
+            engine.close()
+        self.vizualizer.close()
 
     def plot_exoplanet_projection(
         self,
@@ -39,46 +188,434 @@ class ExoplanetService:
         if mollweide:
             display_earth = False  # not supported in Mollweide projection
 
-        df_gaia = self._stars_df
+        stars = self._star_catalog
 
         if exoplanet_name == "Earth":
             return self.vizualizer.plot(
-                df_gaia["ra"].values,
-                df_gaia["dec"].values,
-                df_gaia["phot_g_mean_mag"].values,
-                df_gaia["bp_rp"].values,
+                stars["ra"],
+                stars["dec"],
+                stars["phot_g_mean_mag"],
+                stars["bp_rp"],
                 grid,
                 mollweide,
             )
 
-        # exoplanet = self.get_exoplanet(exoplanet_name)
-        df_gaia = self.get_exoplanet_projection(exoplanet_name)
+        indices, projection = self.get_visible_stars(exoplanet_name)
+        shown = self._without_host_star(exoplanet_name, indices)
         return self.vizualizer.plot(
-            df_gaia["new_ra"].values,
-            df_gaia["new_dec"].values,
-            df_gaia["apparent_magnitude"].values,
-            df_gaia["bp_rp"].values,
+            projection.ra[shown],
+            projection.dec[shown],
+            projection.apparent_magnitude[shown],
+            stars["bp_rp"][indices[shown]],
             grid,
             mollweide,
             earth=self._get_earth_position(exoplanet_name) if display_earth else None,
         )
 
+    def render_sky_map(
+        self,
+        exoplanet_name: str,
+        grid: bool = True,
+        mollweide: bool = False,
+        display_earth: bool = True,
+    ) -> bytes:
+        """
+        `plot_exoplanet_projection` encoded by the vizualizer (PNG), cached by view parameters,
+        magnitude threshold, renderer and catalog version.
+        """
+        if mollweide:
+            display_earth = False  # not supported in Mollweide projection
+        if exoplanet_name == "Earth":
+            display_earth = False  # ignored for the view from Earth
+        key = (
+            exoplanet_name,
+            grid,
+            mollweide,
+            display_earth,
+            float(self.vizualizer.magnitude_treshold),
+            type(self.vizualizer).__name__,
+            self.catalog_version,
+            self._generation,
+        )
+        return self._sky_map_cache.get_or_compute(
+            key, lambda: self._render(exoplanet_name, grid, mollweide, display_earth)
+        )
+
+    def _render(self, exoplanet_name, grid, mollweide, display_earth) -> bytes:
+        with self._render_guard():
+            with metrics.span("render.plot"):
+                figure = self.plot_exoplanet_projection(exoplanet_name, grid, mollweide, display_earth)[0]
+            with metrics.span("render.encode"):
+                return self.vizualizer.encode(figure)
+
+    def _render_guard(self):
+        return nullcontext() if getattr(self.vizualizer, "thread_safe", False) else self._render_lock
+
+    def flight_path(self, exoplanet_name, frames: int, start=(0.0, 0.0, 0.0)) -> np.ndarray:
+        """`frames` observer positions (parsecs) from `start` (the Sun, i.e. the view from Earth) to the exoplanet."""
+        return flight_path(start, self._viewpoint(exoplanet_name), frames)
+
+    def fly_through(self, positions):
+        """
+        Sky seen from every observer position of `positions` (any iterable of Cartesian positions in
+        parsecs, e.g. `flight_path`), streamed one `Projection` at a time by the projection engine.
+        The yielded arrays are reused for the next position, see `ProjectionEngine.project_stream`.
+        """
+        return self._projection_engine.project_stream(positions)
+
+    def render_fly_through(self, positions, grid: bool = True, mollweide: bool = False, hidden_stars=None):
+        """
+        Frames of `fly_through` rendered by the vizualizer, as (height, width, 3) uint8 RGB arrays,
+        without the stars at the catalog indices `hidden_stars` (e.g. the destination's `host_star_indices`).
+        """
+        shown = slice(None)
+        if hidden_stars is not None and len(hidden_stars):
+            shown = np.ones(len(self._star_catalog), dtype=bool)
+            shown[hidden_stars] = False
+        bp_rp = self._star_catalog["bp_rp"][shown]
+        for projection in self.fly_through(positions):
+            with self._render_guard():
+                with metrics.span("fly_through.render"):
+                    ra, dec, apparent_magnitude = (values[shown] for values in projection)
+                    figure = self.vizualizer.plot(ra, dec, apparent_magnitude, bp_rp, grid, mollweide)[0]
+                    frame = self.vizualizer.rasterize(figure)
+            yield frame
+
+    def warm_sky_maps(self, exoplanet_names, views=SKY_MAP_VIEWS) -> None:
+        """Render and cache the sky maps of `exoplanet_names` (e.g. the most visited ones) for every view."""
+        for exoplanet_name in exoplanet_names:
+            for grid, mollweide, display_earth in views:
+                self.render_sky_map(exoplanet_name, grid, mollweide, display_earth)
+
+    def prefetch(self, exoplanet_names, top_k: int = 5, sky_maps: bool = False, views=SKY_MAP_VIEWS) -> int:
+        """
+        Compute in the background what viewing the first `top_k` of `exoplanet_names` needs: their visible
+        stars, then, with `sky_maps`, their sky maps one view at a time (the first view for every exoplanet,
+        then the second, ...). Cancels the work still pending from the previous call; returns the number
+        of queued tasks.
+        """
+        exoplanet_names = list(dict.fromkeys(exoplanet_names))[: max(top_k, 0)]
+        tasks = [lambda name=name: self.get_visible_stars(name) for name in exoplanet_names]
+        if sky_maps:
+            tasks += [
+                lambda name=name, view=view: self.render_sky_map(name, *view)
+                for view in views
+                for name in exoplanet_names
+            ]
+        return self._prefetcher.submit(tasks)
+
+    def cancel_prefetch(self) -> None:
+        self._prefetcher.cancel()
+
+    def prefetch_stats(self) -> dict:
+        return self._prefetcher.stats()
+
+    def prometheus_metrics(self) -> str:
+        """The `exosky.metrics` spans and this service's cache and prefetch counters, in Prometheus text format."""
+        counters = []
+        caches = {
+            "projection": self._projection_cache.stats(),
+            "brightness_order": self._brightness_order_cache.stats(),
+            "sky_map": self._sky_map_cache.stats(),
+        }
+        for cache, stats in caches.items():
+            for counter in ("hits", "misses", "evictions", "disk_hits"):
+                if counter in stats:
+                    counters.append((f"cache_{counter}_total", {"cache": cache}, stats[counter]))
+        for state, count in self.prefetch_stats().items():
+            if state != "pending":
+                counters.append(("prefetch_tasks_total", {"state": state}, count))
+        return metrics.to_prometheus(counters)
+
+    def sky_map_cache_stats(self) -> dict:
+        return self._sky_map_cache.stats()
+
+    @property
+    def catalog_version(self) -> str:
+        return self._catalog_version
+
     def get_exoplanets_within_distance(
-        self, min_distance: Optional[float] = None, max_distance: Optional[float] = None
+        self,
+        min_distance: Optional[float] = None,
+        max_distance: Optional[float] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
     ) -> pd.DataFrame:
-        df_exoplanets = self._explanet_df
-        if min_distance:
-            df_exoplanets = df_exoplanets[df_exoplanets["sy_dist"] >= min_distance]
-        if max_distance:
-            df_exoplanets = df_exoplanets[df_exoplanets["sy_dist"] <= max_distance]
-        return df_exoplanets
+        """
+        Exoplanets with `min_distance <= sy_dist <= max_distance` (either bound optional), sorted by distance.
+
+        The range is found by binary search over the archive pre-sorted by `sy_dist`, and the result is a
+        slice of it; `offset` and `limit` select one page of that slice.
+        """
+        start, stop = self._distance_range(min_distance, max_distance)
+        start = min(start + offset, stop)
+        if limit is not None:
+            stop = min(start + limit, stop)
+        return self._exoplanets_by_distance.iloc[start:stop]
+
+    def count_exoplanets_within_distance(
+        self, min_distance: Optional[float] = None, max_distance: Optional[float] = None
+    ) -> int:
+        start, stop = self._distance_range(min_distance, max_distance)
+        return stop - start
+
+    def _distance_range(self, min_distance: Optional[float], max_distance: Optional[float]) -> tuple[int, int]:
+        distances = self._exoplanet_distances
+        start = 0 if min_distance is None else int(np.searchsorted(distances, min_distance, side="left"))
+        stop = (
+            np.count_nonzero(~np.isnan(distances))
+            if max_distance is None
+            else int(np.searchsorted(distances, max_distance, side="right"))
+        )
+        return start, max(start, stop)
 
     def get_exoplanet(self, exoplanet_name: str):
-        return self._explanet_df[self._explanet_df["pl_name"] == exoplanet_name].iloc[0]
+        return self._explanet_df.iloc[self._exoplanet_name_index[exoplanet_name]]
+
+    def get_host_star(self, exoplanet_name) -> Optional[int]:
+        """Star catalog index of the exoplanet's host star, or None if it is not in the catalog (or for "Earth")."""
+        if exoplanet_name == "Earth":
+            return None
+        host = self._host_stars[self._exoplanet_name_index[exoplanet_name]]
+        return int(host) if host >= 0 else None
+
+    def host_star_indices(self, exoplanet_name, indices=None) -> np.ndarray:
+        """
+        Catalog indices of the stars left out of the exoplanet's sky as its host: the `get_host_star` match
+        or, without one, the stars within `HOST_FALLBACK_DISTANCE` of the exoplanet (none for "Earth").
+        With `indices` (sorted catalog indices), only those among them, as positions in `indices`.
+        """
+        host = self.get_host_star(exoplanet_name)
+        if host is not None:
+            return np.array([host]) if indices is None else np.flatnonzero(indices == host)
+        if exoplanet_name == "Earth":
+            return np.empty(0, dtype=np.intp)
+        xyz = self._projection_engine.xyz
+        relative = (xyz if indices is None else xyz[:, indices]) - self._viewpoint(exoplanet_name)[:, np.newaxis]
+        with np.errstate(invalid="ignore"):
+            return np.flatnonzero(np.einsum("ij,ij->j", relative, relative) < self.HOST_FALLBACK_DISTANCE**2)
+
+    def _without_host_star(self, exoplanet_name, indices):
+        """Positions in `indices` (sorted catalog indices) of every star but the exoplanet's host."""
+        hosts = self.host_star_indices(exoplanet_name, indices)
+        return np.delete(np.arange(len(indices)), hosts) if len(hosts) else slice(None)
+
+    def search_exoplanets(
+        self,
+        query: str,
+        limit: int = 20,
+        min_distance: Optional[float] = None,
+        max_distance: Optional[float] = None,
+    ) -> list[str]:
+        """
+        Exoplanet names starting with, then containing, `query` (case-insensitive), for type-ahead;
+        with distance bounds, only those of `get_exoplanets_within_distance(min_distance, max_distance)`.
+        """
+        index = self._exoplanet_name_index
+        if min_distance is None and max_distance is None:
+            return index.search(query, limit)
+        matches = index.search(query, len(index))
+        distances = self._explanet_df["sy_dist"].to_numpy(dtype=np.float64)[[index[name] for name in matches]]
+        with np.errstate(invalid="ignore"):
+            inside = (distances >= (-np.inf if min_distance is None else min_distance)) & (
+                distances <= (np.inf if max_distance is None else max_distance)
+            )
+        return [name for name, keep in zip(matches, inside) if keep][: max(limit, 0)]
+
+    def get_exoplanet_projection(self, exoplanet_name) -> pd.DataFrame:
+        """
+        Star catalog as seen from the exoplanet, with `new_ra`, `new_dec` and `apparent_magnitude` columns.
+
+        Returns a new DataFrame on every call; the catalog itself is never modified and all the
+        columns are read-only views of the catalog and of the cached projection.
+        Star names are not included, see `StarCatalog.names`.
+        """
+        projection = self.get_projection(exoplanet_name)
+        df = self._star_catalog.to_dataframe()
+        df["new_ra"] = projection.ra
+        df["new_dec"] = projection.dec
+        df["apparent_magnitude"] = projection.apparent_magnitude
+        return df
+
+    def get_projection(self, exoplanet_name) -> Projection:
+        """Read-only `Projection` of the star catalog from the exoplanet, served from the LRU cache."""
+        return self._projection_cache.get_or_compute(
+            (exoplanet_name, self._generation),
+            lambda: self._compute_projection(exoplanet_name).astype(np.float32).freeze(),
+        )
+
+    def projection_cache_stats(self) -> dict:
+        return self._projection_cache.stats()
+
+    def _compute_projection(self, exoplanet_name) -> Projection:
+        with metrics.span(f"projection.{self.projection_mode}"):
+            if self.projection_mode == "astropy":
+                return self._get_exoplanet_projection_astropy(exoplanet_name)
+
+            new_ra, new_dec, _, apparent_magnitude = self._projection_engine.project(self._viewpoint(exoplanet_name))
+            return Projection(new_ra, new_dec, apparent_magnitude)
+
+    def get_visible_stars(
+        self, exoplanet_name, magnitude_threshold: Optional[float] = None
+    ) -> tuple[np.ndarray, Projection]:
+        """
+        Catalog indices and read-only projection of the stars brighter than `magnitude_threshold`
+        (the vizualizer's threshold by default) as seen from the exoplanet, or from "Earth".
+
+        With the NumPy engine only the candidates returned by the `VisibilityIndex` are projected,
+        so the cost follows the number of visible stars rather than the catalog size.
+        """
+        if magnitude_threshold is None:
+            magnitude_threshold = self.vizualizer.magnitude_treshold
+        key = ("visible", exoplanet_name, float(magnitude_threshold), self._generation)
+        return self._projection_cache.get_or_compute(
+            key, lambda: self._compute_visible_stars(exoplanet_name, magnitude_threshold)
+        )
+
+    def _compute_visible_stars(self, exoplanet_name, magnitude_threshold: float) -> tuple[np.ndarray, Projection]:
+        if exoplanet_name == "Earth":
+            candidates = np.arange(len(self._star_catalog))
+            stars = self._star_catalog
+            projection = Projection(stars["ra"], stars["dec"], stars["phot_g_mean_mag"])
+        elif self.projection_mode == "astropy":
+            candidates = np.arange(len(self._star_catalog))
+            projection = self.get_projection(exoplanet_name)
+        else:
+            viewpoint = self._viewpoint(exoplanet_name)
+            with metrics.span("visibility_index.candidates"):
+                candidates = self._visibility_index.candidates(viewpoint, magnitude_threshold)
+            with metrics.span("projection.numpy"):
+                if len(candidates) > len(self._projection_engine) // 2:
+                    # most of the sky is visible, gathering the candidates would cost more than it saves
+                    candidates = np.arange(len(self._projection_engine))
+                    new_ra, new_dec, _, apparent_magnitude = self._projection_engine.project(viewpoint)
+                else:
+                    new_ra, new_dec, _, apparent_magnitude = self._projection_engine.project(viewpoint, candidates)
+            projection = Projection(new_ra, new_dec, apparent_magnitude)
+
+        with metrics.span("filter.magnitude"):
+            (visible,) = np.nonzero(projection.apparent_magnitude < magnitude_threshold)
+            indices = candidates[visible]
+            indices.setflags(write=False)
+            return indices, Projection(*(values[visible] for values in projection)).astype(np.float32).freeze()
+
+    def get_viewport_stars(
+        self,
+        exoplanet_name,
+        ra_range: tuple[float, float],
+        dec_range: tuple[float, float],
+        pixels: Optional[int] = None,
+        magnitude_threshold: Optional[float] = None,
+    ) -> tuple[np.ndarray, Projection]:
+        """
+        Catalog indices and projection of the stars seen from the exoplanet (or "Earth") inside an
+        RA/Dec box, in degrees (`ra_range` wraps through 0 when its start is larger than its end).
+
+        With a `pixels` budget (the size of the view), only the brightest stars are kept, about one per
+        `VIEWPORT_PIXELS_PER_STAR` pixels: a wide view shows the bright stars and zooming in reveals
+        fainter ones, down to `magnitude_threshold` (the vizualizer's threshold by default).
+        Queries go through a `SkyTileIndex` of the visible stars, built once per exoplanet and threshold,
+        so their cost follows the size of the box rather than the catalog. The host star is left out.
+        """
+        if magnitude_threshold is None:
+            magnitude_threshold = self.vizualizer.magnitude_treshold
+        generation = self._generation  # read before the visible stars, see `reload`
+        indices, projection = self.get_visible_stars(exoplanet_name, magnitude_threshold)
+        tiles = self._projection_cache.get_or_compute(
+            ("tiles", exoplanet_name, float(magnitude_threshold), generation),
+            lambda: SkyTileIndex(*projection),
+        )
+        max_stars = None if pixels is None else pixels // self.VIEWPORT_PIXELS_PER_STAR
+        with metrics.span("sky_tiles.query"):
+            selected = tiles.query(*ra_range, *dec_range, max_stars=max_stars)
+        selected = selected[self._without_host_star(exoplanet_name, indices[selected])]
+        return indices[selected], Projection(*(values[selected] for values in projection))
+
+    def _viewpoint(self, exoplanet_name) -> np.ndarray:
+        exoplanet = self.get_exoplanet(exoplanet_name)
+        return spherical_to_cartesian(exoplanet["ra"], exoplanet["dec"], exoplanet["sy_dist"])
+
+    def get_exoplanet_projections(self, exoplanet_names, chunk_size: int = 16):
+        """
+        Project the star catalog for many exoplanets in batched computations.
+
+        Yields (exoplanet name, `Projection`) pairs, the projection being float32 ra, dec and apparent
+        magnitude arrays aligned with the star catalog, as they are computed: only the chunk in progress
+        is held by the engine, so consume the pairs one at a time to keep memory bounded.
+        Always uses the NumPy projection engine.
+        """
+        exoplanet_names = list(dict.fromkeys(exoplanet_names))
+        exoplanets = self._explanet_df.iloc[[self._exoplanet_name_index[name] for name in exoplanet_names]]
+        viewpoints = spherical_to_cartesian(
+            exoplanets["ra"].values, exoplanets["dec"].values, exoplanets["sy_dist"].values
+        )
+        projections = self._projection_engine.project_many(viewpoints, chunk_size=chunk_size)
+        yield from zip(exoplanet_names, projections)
+
+    def brightest_stars(self, exoplanet_name, n: int) -> pd.DataFrame:
+        """
+        The `n` brightest stars seen from the exoplanet, brightest first, with `name`, `new_ra`,
+        `new_dec`, `apparent_magnitude` and a marker size `s` for `plot_star_chart`. The exoplanet's
+        own host star is left out, and the names of stars hosting other exoplanets say so.
+
+        The brightness ordering is computed once per viewpoint and cached, so changing `n` is a slice.
+        """
+        generation = self._generation  # read before the projection, see `reload`
+        projection = self.get_projection(exoplanet_name)
+        order = self._brightness_order_cache.get_or_compute(
+            (exoplanet_name, generation),
+            lambda: self._brightness_order(projection, self.host_star_indices(exoplanet_name)),
+        )[: max(n, 0)]
+        apparent_magnitude = projection.apparent_magnitude[order]
+        return pd.DataFrame(
+            {
+                "name": self._star_names(order),
+                "new_ra": projection.ra[order],
+                "new_dec": projection.dec[order],
+                "apparent_magnitude": apparent_magnitude,
+                "s": 35 * 10 ** (apparent_magnitude / -2.5),
+            }
+        )
+
+    @staticmethod
+    def _brightness_order(projection: Projection, hidden_stars=None) -> np.ndarray:
+        """Indices of the stars with a defined position and magnitude but `hidden_stars`, sorted from brightest."""
+        valid = ~(np.isnan(projection.ra) | np.isnan(projection.dec) | np.isnan(projection.apparent_magnitude))
+        if hidden_stars is not None:
+            valid[hidden_stars] = False
+        (valid,) = np.nonzero(valid)
+        order = valid[np.argsort(projection.apparent_magnitude[valid], kind="stable")]
+        order.setflags(write=False)
+        return order
+
+    def _star_names(self, indices) -> np.ndarray:
+        """Names of the stars at `indices`, as "<source_id> (host of <exoplanet>)" for exoplanet hosts."""
+        names = self._star_catalog.names(indices).astype(object)
+        hosts = self._host_stars
+        (rows,) = np.nonzero(np.isin(hosts, indices))
+        exoplanets = {}
+        for row in rows:  # a host of several exoplanets is named after the first one in the archive
+            exoplanets.setdefault(int(hosts[row]), self._explanet_df["pl_name"].iloc[row])
+        for position in np.flatnonzero(np.isin(indices, hosts[rows])):
+            names[position] = f"{names[position]} (host of {exoplanets[int(indices[position])]})"
+        return names
+
+    def _get_exoplanet_projection_astropy(self, exoplanet_name) -> Projection:
+        # astropy.coordinates takes a large part of the startup time, only import it in this mode
+        import astropy.units as u
+        from astropy.coordinates import (
+            CartesianRepresentation,
+            Distance,
+            SkyCoord,
+            SphericalRepresentation,
+        )
 
-    def get_exoplanet_projection(self, exoplanet_name):
         exoplanet = self.get_exoplanet(exoplanet_name)
-        df_gaia = self._stars_df
+        # the astropy reference works in float64, like the original DataFrame columns
+        stars = {
+            column: self._star_catalog[column].astype(np.float64)
+            for column in ("ra", "dec", "parallax", "phot_g_mean_mag")
+        }
         exoplanet_coord = SkyCoord(
             ra=exoplanet["ra"] * u.deg,
             dec=exoplanet["dec"] * u.deg,
@@ -86,10 +623,10 @@ class ExoplanetService:
         )
 
         star_coord = SkyCoord(
-            ra=df_gaia["ra"].values * u.deg,
-            dec=df_gaia["dec"].values * u.deg,
+            ra=stars["ra"] * u.deg,
+            dec=stars["dec"] * u.deg,
             distance=Distance(
-                parallax=df_gaia["parallax"].values * u.mas, allow_negative=True
+                parallax=stars["parallax"] * u.mas, allow_negative=True
             ),
         )
 
@@ -107,15 +644,15 @@ class ExoplanetService:
         new_ra = star_from_exoplanet.lon.deg
         new_dec = star_from_exoplanet.lat.deg
         absolute_magnitude = (
-            df_gaia["phot_g_mean_mag"] + 5 - 5 * np.log10(1000 / df_gaia["parallax"])
+            stars["phot_g_mean_mag"] + 5 - 5 * np.log10(1000 / stars["parallax"])
         )
         apparent_magnitude = absolute_magnitude - 5 + 5 * np.log10(new_dist)
 
-        df_gaia["new_ra"] = new_ra
-        df_gaia["new_dec"] = new_dec
-        df_gaia["apparent_magnitude"] = apparent_magnitude
-        # df_gaia["name"] = df_gaia["SOURCE_ID"].astype(str)
-        return df_gaia
+        return Projection(
+            np.asarray(new_ra, dtype=np.float64),
+            np.asarray(new_dec, dtype=np.float64),
+            np.asarray(apparent_magnitude, dtype=np.float64),
+        )
 
     def plot_star_chart(self, stars, selected_stars):
         return self.vizualizer.plot_star_chart(stars, selected_stars)
@@ -131,6 +668,55 @@ class ExoplanetService:
         return self.data_loader.load_exoplanet_archive()
 
     @cached_property
-    def _stars_df(self):
-        df = self.data_loader.load_gaia_stars()
-        return df
+    def _exoplanet_name_index(self):
+        return NameIndex(self._explanet_df["pl_name"].values)
+
+    @cached_property
+    def _exoplanets_by_distance(self):
+        return self._explanet_df.sort_values("sy_dist", kind="stable", na_position="last")
+
+    @cached_property
+    def _exoplanet_distances(self):
+        return self._exoplanets_by_distance["sy_dist"].to_numpy(dtype=np.float64)
+
+    @cached_property
+    def _star_catalog(self) -> StarCatalog:
+        return StarCatalog.from_dataframe(self.data_loader.load_gaia_stars())
+
+    @cached_property
+    def _host_stars(self) -> np.ndarray:
+        """Star catalog index of the host star of every archive row, -1 for hosts without a Gaia match."""
+        stars = self._star_catalog
+        with np.errstate(divide="ignore"):
+            distance = np.where(stars["parallax"] > 0, 1000 / stars["parallax"].astype(np.float64), np.nan)
+        with metrics.span("crossmatch.hosts"):
+            index = NearestStarIndex(stars["ra"], stars["dec"], distance, self.HOST_MATCH_SEPARATION)
+            hosts, _ = index.query(
+                self._explanet_df["ra"].to_numpy(dtype=np.float64),
+                self._explanet_df["dec"].to_numpy(dtype=np.float64),
+                self._explanet_df["sy_dist"].to_numpy(dtype=np.float64),
+                self.HOST_MATCH_DISTANCE_TOLERANCE,
+            )
+        hosts.setflags(write=False)
+        return hosts
+
+    @cached_property
+    def _catalog_version(self) -> str:
+        catalog_version = getattr(self.data_loader, "catalog_version", None)
+        return catalog_version() if catalog_version is not None else "unversioned"
+
+    @cached_property
+    def _projection_engine(self):
+        engine = ProjectionEngine.from_dataframe(self._star_catalog)
+        if self.projection_workers > 1:
+            return ParallelProjectionEngine(engine, self.projection_workers)
+        return engine
+
+    @cached_property
+    def _visibility_index(self):
+        engine = self._projection_engine
+        return VisibilityIndex(
+            engine.xyz,
+            engine.absolute_magnitude,
+            reference_threshold=getattr(self.vizualizer, "magnitude_treshold", 10),
+        )
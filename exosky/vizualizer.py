@@ -1,17 +1,144 @@
+import io
+import threading
+
 import matplotlib.pyplot as plt
 import numpy as np
-import plotly.graph_objects as go
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from matplotlib.patches import Circle
 
+# degrees around the Earth inset whose stars are drawn in it: the largest inset markers (100 points² x 30)
+# have a radius of about 4.5 degrees at the inset's 10 degrees per 30 degrees of the main axes
+INSET_MARGIN = 5
+
+
+class SkyFigure(Figure):
+    """
+    Sky map figure owned by a `MollweideVizualizer` pool. The axes, ticks and star scatter are built
+    once; `update` swaps the data in place and rebuilds only the optional Earth markers.
+    """
+
+    def __init__(self, vizualizer, mollweide: bool):
+        super().__init__(figsize=(20, 12))
+        self.mollweide = mollweide
+        self.ax = self.add_subplot(111, projection="mollweide" if mollweide else None)
+        self.ax.margins(x=0, y=0, tight=True)
+        self.ax.set_facecolor("#000033")
+        self.stars = self.ax.scatter(
+            [], [], s=[], c=[], cmap=vizualizer.cmap, norm=vizualizer.norm, alpha=0.75
+        )
+
+        # Adjust axis labels and ticks to white to contrast with the dark projection background
+        self.ax.set_xticks(
+            np.radians(
+                [-180, -150, -120, -90, -60, -30, 0, 30, 60, 90, 120, 150, 180][::1]
+            )
+        )
+        self.ax.set_yticks(np.radians([-80, -60, -40, -20, 0, 20, 40, 60, 80][::1]))
+        self.ax.xaxis.label.set_color("white")
+        self.ax.yaxis.label.set_color("white")
+        self.ax.tick_params(axis="both", colors="white")
+        self.ax.xaxis.set_ticklabels([])
+        self.ax.yaxis.set_ticklabels([])
+        self.earth_artists = []
+
+    def update(self, vizualizer, ra_rad, dec_rad, size, bp_rp_arr, grid: bool, earth):
+        self.clear_data()
+        self.ax.grid(grid)
+        self.stars.set_offsets(np.column_stack((ra_rad, dec_rad)))
+        self.stars.set_sizes(size)
+        self.stars.set_array(bp_rp_arr)
+        x, y = [ra_rad], [dec_rad]
+
+        if earth:
+            axins = vizualizer._add_earth_subplot(self.ax, earth)
+
+            earth_mag = (
+                4.83 - 5 + 5 * np.log10(earth[2])
+            )  # 4.83 is a sun absolute magnitude
+
+            axins.scatter(
+                np.radians(earth[0]),
+                np.radians(earth[1]),
+                s=np.clip(np.exp(4 - earth_mag) * 30, 0, 100),
+                c="white",
+                # cmap=self.cmap,
+                # norm=self.norm,
+                alpha=0.75,
+            )
+            # only the stars around the zoomed region, with a margin for the largest markers
+            xlim, ylim = axins.get_xlim(), axins.get_ylim()
+            margin = np.radians(INSET_MARGIN)
+            near = (ra_rad >= xlim[0] - margin) & (ra_rad <= xlim[1] + margin)
+            near &= (dec_rad >= ylim[0] - margin) & (dec_rad <= ylim[1] + margin)
+            axins.scatter(
+                ra_rad[near],
+                dec_rad[near],
+                s=size[near] * 30,
+                c=bp_rp_arr[near],
+                cmap=vizualizer.cmap,
+                norm=vizualizer.norm,
+                alpha=0.75,
+            )
+            earth_marker = self.ax.scatter(
+                np.radians(earth[0]),
+                np.radians(earth[1]),
+                s=np.clip(np.exp(4 - earth_mag), 0, 100),
+                c="white",
+                # cmap=self.cmap,
+                # norm=self.norm,
+                alpha=0.75,
+            )
+            indicator = self.ax.indicate_inset_zoom(axins, edgecolor="white", linewidth=2)
+            # matplotlib < 3.10 returns the rectangle and its connectors instead of one artist
+            indicator = [indicator] if isinstance(indicator, Artist) else [indicator[0], *indicator[1]]
+            self.earth_artists = [axins, earth_marker, *indicator]
+            x.append([np.radians(earth[0])])
+            y.append([np.radians(earth[1])])
+
+        if not self.mollweide:
+            # updated offsets are not autoscaled: fit the data, and the ticks unless the Earth marker
+            # was added (a fresh figure autoscaled again to the data alone after that scatter)
+            if not earth:
+                x.append(self.ax.get_xticks())
+                y.append(self.ax.get_yticks())
+            x, y = np.concatenate(x), np.concatenate(y)
+            if len(x):
+                self.ax.set_xlim(x.min(), x.max())
+                self.ax.set_ylim(y.min(), y.max())
+
+    def clear_data(self):
+        """Drop the star data and Earth markers, so a pooled figure does not hold on to them."""
+        for artist in self.earth_artists:
+            artist.remove()
+        self.earth_artists = []
+        self.stars.set_offsets(np.empty((0, 2)))
+        self.stars.set_sizes([])
+        self.stars.set_array(np.empty(0))
+
 
 class MollweideVizualizer:
+    """
+    Renders sky maps with matplotlib.
+
+    Figures come from a small pool (`pool_size` per projection) and are updated in place, since
+    building a 20x12 figure with its axes is a large part of a render. They are plain `Figure`
+    objects, not registered with pyplot, so a figure that is never released is simply garbage
+    collected; `release` (or `encode`) returns it to the pool and `close` empties the pool.
+    """
+
+    thread_safe = False  # matplotlib artists and caches are not thread safe
 
-    def __init__(self, magnitude_treshold: float = 10):
+    def __init__(self, magnitude_treshold: float = 10, pool_size: int = 2):
         self.cmap = plt.get_cmap("coolwarm")  # A colormap going from blue to red
         self.norm = plt.Normalize(
             vmin=-5, vmax=7
         )  # Normalize 'bp_rp' values for color mapping
         self.magnitude_treshold = magnitude_treshold
+        self.pool_size = pool_size
+        self._pool = {False: [], True: []}
+        self._pool_lock = threading.Lock()
 
     def plot(
         self,
@@ -23,18 +150,12 @@ class MollweideVizualizer:
         mollweide: bool = False,
         earth: tuple[float, float, float] | None = None,
     ):
+        # the host star of the viewpoint is left out by the service (see `ExoplanetService.host_star_indices`)
         bright_starts = mag_arr < self.magnitude_treshold
-        local_sun = mag_arr < -7
-        ra_arr = ra_arr[bright_starts & ~local_sun]
-        dec_arr = dec_arr[bright_starts & ~local_sun]
-        mag_arr = mag_arr[bright_starts & ~local_sun]
-        bp_rp_arr = bp_rp_arr[bright_starts & ~local_sun]
-
-        # Create a figure
-        fig = plt.figure(figsize=(20, 12))
-        ax = fig.add_subplot(111, projection="mollweide" if mollweide else None)
-        ax.margins(x=0, y=0, tight=True)
-        ax.grid(grid)
+        ra_arr = ra_arr[bright_starts]
+        dec_arr = dec_arr[bright_starts]
+        mag_arr = mag_arr[bright_starts]
+        bp_rp_arr = bp_rp_arr[bright_starts]
 
         # Using Mollweide projection for RA/DEC
         ra_rad = np.radians(ra_arr - 180)
@@ -45,73 +166,53 @@ class MollweideVizualizer:
         size = np.clip(size, 0, 100) * 2
         # size = 100 * 10 ** (mag_arr / -2.5)
 
-        ax.set_facecolor("#000033")
-
-        ax.scatter(
-            ra_rad,
-            dec_rad,
-            s=size,
-            c=bp_rp_arr,
-            cmap=self.cmap,
-            norm=self.norm,
-            alpha=0.75,
-        )
-
         # Add labels and title
         # ax.set_xlabel("Right Ascension (degrees)", color="black")
         # ax.set_ylabel("Declination (degrees)", color="black")
         # ax.set_title("Star Map from Gaia Data (Mollweide Projection)", color="black")
 
-        # Adjust axis labels and ticks to white to contrast with the dark projection background
-        ax.set_xticks(
-            np.radians(
-                [-180, -150, -120, -90, -60, -30, 0, 30, 60, 90, 120, 150, 180][::1]
-            )
-        )
-        ax.set_yticks(np.radians([-80, -60, -40, -20, 0, 20, 40, 60, 80][::1]))
-        ax.xaxis.label.set_color("white")
-        ax.yaxis.label.set_color("white")
-        ax.tick_params(axis="both", colors="white")
-        ax.xaxis.set_ticklabels([])
-        ax.yaxis.set_ticklabels([])
+        fig = self._acquire(mollweide)
+        fig.update(self, ra_rad, dec_rad, size, bp_rp_arr, grid, earth)
+        return fig, fig.ax
 
-        if earth:
-            axins = self._add_earth_subplot(ax, earth)
+    def encode(self, fig) -> bytes:
+        """Encode a figure returned by `plot` to PNG and release it."""
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        self.release(fig)
+        return buffer.getvalue()
 
-            earth_mag = (
-                4.83 - 5 + 5 * np.log10(earth[2])
-            )  # 4.83 is a sun absolute magnitude
+    def rasterize(self, fig) -> np.ndarray:
+        """Draw a figure returned by `plot` into a (height, width, 3) uint8 RGB array and release it."""
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        rgb = np.asarray(canvas.buffer_rgba())[..., :3].copy()
+        self.release(fig)
+        return rgb
 
-            axins.scatter(
-                np.radians(earth[0]),
-                np.radians(earth[1]),
-                s=np.clip(np.exp(4 - earth_mag) * 30, 0, 100),
-                c="white",
-                # cmap=self.cmap,
-                # norm=self.norm,
-                alpha=0.75,
-            )
-            axins.scatter(
-                ra_rad,
-                dec_rad,
-                s=size * 30,
-                c=bp_rp_arr,
-                cmap=self.cmap,
-                norm=self.norm,
-                alpha=0.75,
-            )
-            ax.scatter(
-                np.radians(earth[0]),
-                np.radians(earth[1]),
-                s=np.clip(np.exp(4 - earth_mag), 0, 100),
-                c="white",
-                # cmap=self.cmap,
-                # norm=self.norm,
-                alpha=0.75,
-            )
-            ax.indicate_inset_zoom(axins, edgecolor="white", linewidth=2)
+    def release(self, fig) -> None:
+        """Return a figure from `plot` to the pool; the caller must not use it afterwards."""
+        if not isinstance(fig, SkyFigure):
+            plt.close(fig)
+            return
+        fig.clear_data()
+        with self._pool_lock:
+            pool = self._pool[fig.mollweide]
+            if len(pool) < self.pool_size and fig not in pool:
+                pool.append(fig)
 
-        return fig, ax
+    def close(self) -> None:
+        """Drop the pooled figures."""
+        with self._pool_lock:
+            for pool in self._pool.values():
+                pool.clear()
+
+    def _acquire(self, mollweide: bool) -> SkyFigure:
+        with self._pool_lock:
+            pool = self._pool[mollweide]
+            if pool:
+                return pool.pop()
+        return SkyFigure(self, mollweide)
 
     def _add_earth_subplot(self, ax, earth):
 
@@ -144,37 +245,51 @@ class MollweideVizualizer:
         return axins
 
     def plot_star_chart(self, df, selected_stars):
-        """Plot the star chart and handle drawing mode."""
+        """
+        Plot the star chart and handle drawing mode.
+
+        Stars are one WebGL trace and the constellation is one line trace whose segments are
+        separated by None gaps, so the figure size does not grow with the number of segments.
+        """
+        import plotly.graph_objects as go  # only needed in drawing mode
+
         fig = go.Figure()
 
+        ra = df["new_ra"].to_numpy()
+        dec = df["new_dec"].to_numpy()
+        names = df["name"].to_numpy()
+
         # Plot stars as scatter plot based on real exoplanet data
         fig.add_trace(
-            go.Scatter(
-                x=df["new_ra"],  # Right Ascension
-                y=df["new_dec"],  # Declination
+            go.Scattergl(
+                x=ra,  # Right Ascension
+                y=dec,  # Declination
                 mode="markers",
-                marker=dict(size=df["s"], color="white"),  # Size depends on 's' column
-                text=df["name"],  # Exoplanet names
+                marker=dict(size=df["s"].to_numpy(), color="white"),  # Size depends on 's' column
+                text=names,  # Exoplanet names
                 name="Stars",
             )
         )
 
         # Draw lines between selected stars
         if len(selected_stars) > 1:
-            for i in range(len(selected_stars) - 1):
-                star1 = df[df["name"] == selected_stars[i]].iloc[0]
-                star2 = df[df["name"] == selected_stars[i + 1]].iloc[0]
-                fig.add_trace(
-                    go.Scatter(
-                        x=[star1["new_ra"], star2["new_ra"]],
-                        y=[star1["new_dec"], star2["new_dec"]],
-                        mode="lines",
-                        line=dict(
-                            color="yellow", width=2
-                        ),  # Connection lines in yellow
-                        name="Constellation",
-                    )
+            positions = {name: i for i, name in reversed(list(enumerate(names)))}
+            line_x, line_y = [], []
+            for star1, star2 in zip(selected_stars[:-1], selected_stars[1:]):
+                if star1 not in positions or star2 not in positions:
+                    continue  # the star is no longer among the displayed ones
+                i, j = positions[star1], positions[star2]
+                line_x += [ra[i], ra[j], None]
+                line_y += [dec[i], dec[j], None]
+            fig.add_trace(
+                go.Scattergl(
+                    x=line_x,
+                    y=line_y,
+                    mode="lines",
+                    line=dict(color="yellow", width=2),  # Connection lines in yellow
+                    name="Constellation",
                 )
+            )
 
         # Update layout for the figure
         fig.update_layout(